@@ -1,9 +1,18 @@
 import os
+import copy
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 import pygame
 import chess_engine  # Importa tu motor de ajedrez, que contiene la lógica del juego.
 import chess_ai  # Importa el módulo de inteligencia artificial.
 import sys
 
+# Los avisos de la partida van a logging y no salen por consola salvo que se configure un handler.
+logger = logging.getLogger(__name__)
+DEBUG = False  # Si es True, se imprimen por consola los mensajes de depuración del bucle principal.
+
 def obtener_ruta_recurso(rel_path):
     """Devuelve la ruta absoluta, compatible con PyInstaller."""
     try:
@@ -17,7 +26,12 @@ ANCHO_PANTALLA = ALTO_PANTALLA = 800  # Dimensiones de la ventana del juego (cua
 DIMENSION = 8  # El tablero de ajedrez es de 8x8 casillas.
 TAMANIO_CASILLA = ALTO_PANTALLA // DIMENSION  # Calcula el tamaño de cada casilla en píxeles (512 / 8 = 64px).
 IMAGENES = {}  # Diccionario global para almacenar las imágenes de las piezas, cargadas una vez al inicio.
+FONDO_TABLERO = None  # Superficie con las casillas ya dibujadas (ver construir_fondo_tablero).
+CAPA_ETIQUETAS = None  # Superficie transparente con las etiquetas de filas y columnas, se dibuja encima de todo.
+FUENTE_ETIQUETAS = None  # Fuente de las etiquetas, creada en construir_fondo_tablero().
+ETIQUETAS_SURFS = {}  # Texto ya renderizado de cada etiqueta ("a"-"h", "1"-"8").
 FPS_MAX = 60  # Límite de fotogramas por segundo para la actualización de la pantalla.
+FPS_REPOSO = 30  # Fotogramas por segundo en el menú o con la partida terminada, donde nada se anima.
 
 # Definición de colores para el tablero y elementos de la interfaz de usuario.
 # Colores de tablero de ajedrez modernos y suaves (tonos de madera/grisáceos)
@@ -30,12 +44,34 @@ COLOR_MOVIMIENTO_NORMAL = (100, 100, 255, 120)  # Azul claro semitransparente pa
 COLOR_MOVIMIENTO_CAPTURAS = (255, 50, 50, 120)  # Rojo ligeramente menos intenso semitransparente para capturas
 COLOR_JAQUE = (255, 50, 50)           # Rojo intenso para resaltar el rey en jaque (sin transparencia para mayor impacto)
 
+# Superficies de resaltado ya rellenas con los colores anteriores; se crean una vez en crear_superficies_resaltado().
+SURF_SELECCION = None
+SURF_MOV_NORMAL = None
+SURF_MOV_CAPTURA = None
+SURF_JAQUE = None
+
 # Colores adicionales para el menú y fondo general
 COLOR_TEXTO_MENU = (255, 255, 255)    # Blanco para el texto del menú
 COLOR_FONDO_MENU = (30, 30, 30)       # Gris muy oscuro, casi negro, para un fondo elegante
 COLOR_BOTON_NORMAL = (70, 70, 70)     # Gris intermedio para los botones
 COLOR_BOTON_HOVER = (120, 120, 120)   # Gris más claro para el efecto hover del botón
-COLOR_FONDO_ETIQUETA = (0, 0, 0, 100) # Negro semitransparente para el fondo de las etiquetas (nueva constante)
+COLOR_TEXTO_ETIQUETA = (240, 240, 240) # Blanco grisáceo para las etiquetas de filas y columnas
+
+
+# --- Recursos del Menú ---
+# Los rectángulos de los botones no dependen de pygame.init(), así que se crean aquí directamente.
+JUGAR_RECT = pygame.Rect(ANCHO_PANTALLA // 2 - 120, ALTO_PANTALLA // 2 - 40, 240, 70)
+SALIR_RECT = pygame.Rect(ANCHO_PANTALLA // 2 - 120, ALTO_PANTALLA // 2 + 60, 240, 70)
+# Fuentes y textos ya renderizados del menú. Se crean una sola vez en cargar_recursos_menu(),
+# porque SysFont y render requieren que pygame esté inicializado.
+FUENTE_BOTON = None
+TITULO_SURF = None
+TITULO_SHADOW_SURF = None
+TITULO_RECT = None
+JUGAR_TEXT_SURF = None
+SALIR_TEXT_SURF = None
+FUENTE_BANNER = None  # Fuente de los avisos centrados (jaque, mate, ahogado...)
+BANNERS = {}  # (texto, color) -> (fondo, pos_fondo, texto_obj, texto_rect) ya preparados por dibujar_texto_centro()
 
 
 # --- Estados del Juego ---
@@ -45,6 +81,7 @@ GAME_STATE = 1
 # --- Variables de Configuración de la IA ---
 JUGADOR_HUMANO_BLANCAS = True
 JUGADOR_HUMANO_NEGRAS = False
+HUMANOS = {'w': JUGADOR_HUMANO_BLANCAS, 'b': JUGADOR_HUMANO_NEGRAS}  # Quién es humano, por color de pieza
 
 
 def cargar_imagenes():
@@ -52,6 +89,8 @@ def cargar_imagenes():
     Carga todas las imágenes de las piezas de ajedrez y las escala al tamaño de la casilla.
     Las imágenes deben estar en una carpeta 'images/' dentro del directorio del script.
     Las imágenes se almacenan en el diccionario global IMAGENES para acceso rápido.
+    Se convierten al formato de píxel de la pantalla con convert_alpha(), por lo que
+    debe llamarse después de pygame.display.set_mode().
     """
     piezas = ['wp', 'wr', 'wn', 'wb', 'wq', 'wk', 'bp', 'br', 'bn', 'bb', 'bq', 'bk']
     for pieza in piezas:
@@ -59,46 +98,104 @@ def cargar_imagenes():
             IMAGENES[pieza] = pygame.transform.scale(
                 pygame.image.load(obtener_ruta_recurso("images/" + pieza + ".png")),
                 (TAMANIO_CASILLA, TAMANIO_CASILLA)
-            )
+            ).convert_alpha() # Mismo formato que la pantalla: el blit no convierte píxeles cada vez
+            # RLEACCEL hace que SDL guarde la imagen comprimida por tramos y salte de golpe
+            # el borde transparente de las piezas al copiarlas (alfa 255: sin cambio de opacidad).
+            IMAGENES[pieza].set_alpha(255, pygame.RLEACCEL)
         except pygame.error as e:
-            print(f"Error cargando imagen de pieza {pieza}: {e}")
-            IMAGENES[pieza] = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA)
+            logger.warning("Error cargando imagen de pieza %s: %s", pieza, e)
+            IMAGENES[pieza] = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA).convert_alpha()
             IMAGENES[pieza].fill((255, 0, 255)) # Color magenta para indicar pieza faltante
 
-def dibujar_menu(pantalla):
+def construir_fondo_tablero():
     """
-    Dibuja el menú principal del juego en la pantalla con un estilo mejorado.
-    Muestra el título del juego y botones interactivos para "Jugar" y "Salir".
+    Dibuja una sola vez las casillas y las etiquetas de filas/columnas en superficies propias.
+    Como el tablero nunca cambia, cada fotograma solo necesita copiar estas dos superficies.
+    Las etiquetas van en una capa transparente aparte porque deben quedar por encima de las piezas.
+    Debe llamarse después de pygame.display.set_mode() para que convert() sea válido.
     """
-    pantalla.fill(COLOR_FONDO_MENU)
+    global FONDO_TABLERO, CAPA_ETIQUETAS, FUENTE_ETIQUETAS
+    FUENTE_ETIQUETAS = pygame.font.SysFont("Arial", 14, bold=True) # Fuente un poco más moderna para las etiquetas
+    for caracter in "abcdefgh12345678":
+        ETIQUETAS_SURFS[caracter] = FUENTE_ETIQUETAS.render(caracter, True, COLOR_TEXTO_ETIQUETA)
+
+    FONDO_TABLERO = pygame.Surface((ANCHO_PANTALLA, ALTO_PANTALLA)).convert()
+    dibujar_tablero(FONDO_TABLERO)
+    CAPA_ETIQUETAS = pygame.Surface((ANCHO_PANTALLA, ALTO_PANTALLA), pygame.SRCALPHA).convert_alpha()
+    dibujar_etiquetas_filas_columnas(CAPA_ETIQUETAS)
+
+
+def crear_superficies_resaltado():
+    """
+    Crea una sola vez las superficies semitransparentes usadas para resaltar casillas,
+    para que resaltar_casillas() solo tenga que copiarlas en cada fotograma.
+    """
+    global SURF_SELECCION, SURF_MOV_NORMAL, SURF_MOV_CAPTURA, SURF_JAQUE
+    SURF_SELECCION = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA)
+    SURF_SELECCION.fill(COLOR_RESALTE)
+    SURF_MOV_NORMAL = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA)
+    SURF_MOV_NORMAL.fill(COLOR_MOVIMIENTO_NORMAL)
+    SURF_MOV_CAPTURA = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA)
+    SURF_MOV_CAPTURA.fill(COLOR_MOVIMIENTO_CAPTURAS)
+    SURF_JAQUE = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA)
+    SURF_JAQUE.fill(COLOR_JAQUE)
+
+
+def cargar_recursos_menu():
+    """
+    Crea una sola vez las fuentes y superficies de texto del menú principal.
+    SysFont busca la fuente en el sistema en cada llamada, así que no debe invocarse por fotograma.
+    Debe llamarse después de pygame.init().
+    """
+    global FUENTE_BOTON, TITULO_SURF, TITULO_SHADOW_SURF, TITULO_RECT, JUGAR_TEXT_SURF, SALIR_TEXT_SURF, FUENTE_BANNER
     # Usamos una fuente predeterminada de Pygame con un tamaño generoso para el título
     fuente_titulo = pygame.font.SysFont("Arial", 72, True, False) # Arial como opción común
-    fuente_boton = pygame.font.SysFont("Arial", 36, True, False) # Arial para botones
+    FUENTE_BOTON = pygame.font.SysFont("Arial", 36, True, False) # Arial para botones
+    FUENTE_BANNER = pygame.font.SysFont("Arial", 40, True, False) # Fuente más grande y moderna para mensajes
+
+    # Título del juego con una ligera sombra (simulada con dos textos)
+    TITULO_SURF = fuente_titulo.render("A J E D R E Z", True, (200, 200, 200)) # Un gris más claro para el título
+    TITULO_SHADOW_SURF = fuente_titulo.render("A J E D R E Z", True, (50, 50, 50))
+    TITULO_RECT = TITULO_SURF.get_rect(center=(ANCHO_PANTALLA // 2, ALTO_PANTALLA // 4))
 
-    # Dibuja el título del juego con un ligero borde o sombra (simulado con dos textos)
-    titulo_obj = fuente_titulo.render("A J E D R E Z", True, (200, 200, 200)) # Un gris más claro para el título
-    titulo_rect = titulo_obj.get_rect(center=(ANCHO_PANTALLA // 2, ALTO_PANTALLA // 4))
-    # Sombra ligera
-    pantalla.blit(fuente_titulo.render("A J E D R E Z", True, (50, 50, 50)), (titulo_rect.x + 2, titulo_rect.y + 2))
-    pantalla.blit(titulo_obj, titulo_rect)
+    JUGAR_TEXT_SURF = FUENTE_BOTON.render("Jugar", True, COLOR_TEXTO_MENU)
+    SALIR_TEXT_SURF = FUENTE_BOTON.render("Salir", True, COLOR_TEXTO_MENU)
 
 
-    # Define las propiedades de los botones.
-    # Los botones son más grandes para una mejor interacción táctil o con el ratón.
-    botones = {
-        "Jugar": pygame.Rect(ANCHO_PANTALLA // 2 - 120, ALTO_PANTALLA // 2 - 40, 240, 70),
-        "Salir": pygame.Rect(ANCHO_PANTALLA // 2 - 120, ALTO_PANTALLA // 2 + 60, 240, 70)
-    }
+def boton_bajo_raton(pos_mouse):
+    """
+    Devuelve el rectángulo del botón del menú que está bajo el ratón, o None si no hay ninguno.
+    Args:
+        pos_mouse (tuple): Coordenadas (x, y) del ratón.
+    """
+    for rect in (JUGAR_RECT, SALIR_RECT):
+        if rect.collidepoint(pos_mouse):
+            return rect
+    return None
 
-    pos_mouse = pygame.mouse.get_pos()
 
-    for texto, rect in botones.items():
+def dibujar_menu(pantalla, boton_hover):
+    """
+    Dibuja el menú principal del juego en la pantalla con un estilo mejorado.
+    Muestra el título del juego y botones interactivos para "Jugar" y "Salir".
+    Usa las superficies precalculadas por cargar_recursos_menu().
+    Args:
+        pantalla (pygame.Surface): La superficie de Pygame donde se dibujará.
+        boton_hover (pygame.Rect): Botón bajo el ratón (ver boton_bajo_raton), o None.
+    """
+    pantalla.fill(COLOR_FONDO_MENU)
+
+    # Sombra ligera y título
+    pantalla.blit(TITULO_SHADOW_SURF, (TITULO_RECT.x + 2, TITULO_RECT.y + 2))
+    pantalla.blit(TITULO_SURF, TITULO_RECT)
+
+    # Los botones son grandes para una mejor interacción táctil o con el ratón.
+    for rect, texto_obj in ((JUGAR_RECT, JUGAR_TEXT_SURF), (SALIR_RECT, SALIR_TEXT_SURF)):
         color_boton = COLOR_BOTON_NORMAL
-        if rect.collidepoint(pos_mouse):
+        if rect is boton_hover:
             color_boton = COLOR_BOTON_HOVER
         pygame.draw.rect(pantalla, color_boton, rect, border_radius=15) # Bordes más redondeados
 
-        texto_obj = fuente_boton.render(texto, True, COLOR_TEXTO_MENU)
         texto_rect = texto_obj.get_rect(center=rect.center)
         pantalla.blit(texto_obj, texto_rect)
 
@@ -114,78 +211,196 @@ def manejar_clicks_menu(pos_mouse):
     Returns:
         int or str or None: El nuevo estado del juego (GAME_STATE), "QUIT" para salir, o None si no hay cambio.
     """
-    botones = {
-        "Jugar": pygame.Rect(ANCHO_PANTALLA // 2 - 120, ALTO_PANTALLA // 2 - 40, 240, 70),
-        "Salir": pygame.Rect(ANCHO_PANTALLA // 2 - 120, ALTO_PANTALLA // 2 + 60, 240, 70)
-    }
-
-    if botones["Jugar"].collidepoint(pos_mouse):
+    if JUGAR_RECT.collidepoint(pos_mouse):
         return GAME_STATE
-    elif botones["Salir"].collidepoint(pos_mouse):
+    elif SALIR_RECT.collidepoint(pos_mouse):
         return "QUIT"
     return None
 
 
+def indexar_resaltados_por_origen(movimientos_legales):
+    """
+    Agrupa los movimientos legales por su casilla de origen, para que el resaltado de la
+    pieza seleccionada sea una consulta al diccionario en lugar de recorrer toda la lista en cada fotograma.
+    Para cada movimiento se guarda ya la superficie de resaltado (normal o captura) y su posición en pantalla,
+    así el dibujo no vuelve a mirar el tablero ni a decidir el color.
+    Args:
+        movimientos_legales (list): Lista de objetos Movimiento legales para el turno actual.
+    Returns:
+        dict: {(fila, col): [(pygame.Surface, (x, y)), ...]} con los resaltados de los movimientos que parten de cada casilla.
+    """
+    resaltados_por_origen = {}
+    for mov in movimientos_legales:
+        surf_indicador = SURF_MOV_CAPTURA if mov.pieza_capturada != "--" else SURF_MOV_NORMAL
+        pos_indicador = (mov.col_final * TAMANIO_CASILLA, mov.fila_final * TAMANIO_CASILLA)
+        resaltados_por_origen.setdefault((mov.fila_inicial, mov.col_inicial), []).append((surf_indicador, pos_indicador))
+    return resaltados_por_origen
+
+
+def listar_piezas(tablero):
+    """
+    Reúne las casillas ocupadas del tablero con la imagen y la posición en pantalla de su pieza.
+    Solo cambia cuando se hace o deshace un movimiento, así que dibujar_piezas() recorre esta lista
+    en cada fotograma en lugar de revisar las 64 casillas.
+    Args:
+        tablero (list): La representación 2D del tablero de ajedrez.
+    Returns:
+        list: [((fila, col), pygame.Surface, (x, y)), ...] con una entrada por pieza.
+    """
+    piezas = []
+    for fila in range(DIMENSION):
+        for col in range(DIMENSION):
+            pieza = tablero[fila][col]
+            # Asegúrate de que la imagen exista en IMAGENES antes de intentar dibujarla
+            if pieza != "--" and pieza in IMAGENES:
+                piezas.append(((fila, col), IMAGENES[pieza], (col * TAMANIO_CASILLA, fila * TAMANIO_CASILLA)))
+    return piezas
+
+
+class Seleccion:
+    """
+    Estado de la selección del jugador: la casilla elegida, los clicks que forman el movimiento
+    y, durante un arrastre, la imagen de la pieza y la posición de su casilla de origen.
+    """
+    __slots__ = ('sq', 'clicks', 'pieza', 'pos_original')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Deja la selección vacía (ninguna casilla elegida y nada arrastrándose)."""
+        self.sq = ()  # Casilla (fila, col) seleccionada
+        self.clicks = []  # Casillas clickeadas para formar el movimiento
+        self.pieza = None  # Imagen de la pieza que se está arrastrando (None si no hay)
+        self.pos_original = ()  # Posición (x, y) en píxeles de la casilla de origen de la pieza arrastrada
+
+
+class ProgresoIA:
+    """
+    Recoge lo que informa chess_ai.find_best_move() desde el hilo de la IA al terminar cada profundidad.
+    El bucle principal solo lo lee, así que basta con asignar los atributos.
+    """
+    __slots__ = ('profundidad', 'movimiento')
+
+    def __init__(self):
+        self.profundidad = 0  # Última profundidad terminada
+        self.movimiento = None  # Mejor movimiento a esa profundidad
+
+    def actualizar(self, profundidad, movimiento):
+        """Callback progress_cb para find_best_move()."""
+        self.profundidad = profundidad
+        self.movimiento = movimiento
+
+
+def es_turno_ia(juego):
+    """
+    Indica si el bando que mueve en la partida lo controla la IA (según HUMANOS).
+    Args:
+        juego (chess_engine.EstadoJuego): La partida en curso, o None si no hay ninguna.
+    """
+    return juego is not None and not HUMANOS['w' if juego.turno_blancas else 'b']
+
+
 def main():
     """
     Función principal que inicializa Pygame y ejecuta el bucle principal del juego de ajedrez.
     Gestiona el flujo entre el menú y el juego, la interacción del usuario, la IA y el renderizado.
     """
     pygame.init()
+    # Solo dejamos entrar en la cola de SDL los eventos que el bucle principal atiende.
+    # MOUSEMOTION se habilita únicamente mientras se arrastra una pieza (ver manejo de clicks).
+    pygame.event.set_blocked(None)
+    # VIDEOEXPOSE avisa de que la ventana se ha vuelto a mostrar y hay que repintarla.
+    pygame.event.set_allowed([pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.KEYDOWN, pygame.VIDEOEXPOSE])
     pantalla = pygame.display.set_mode((ANCHO_PANTALLA, ALTO_PANTALLA))
     pygame.display.set_caption("Ajedrez Definitivo") # Nuevo título para la ventana
     reloj = pygame.time.Clock()
 
     cargar_imagenes()
+    construir_fondo_tablero()
+    crear_superficies_resaltado()
+    cargar_recursos_menu()
+
+    # La IA busca en un hilo aparte para que el bucle siga dibujando y leyendo eventos mientras piensa.
+    ejecutor_ia = ThreadPoolExecutor(max_workers=1)
+    futuro_ia = None # Búsqueda de la IA en curso (None si no hay ninguna)
+    cancelar_ia = None # threading.Event que detiene esa búsqueda entre movimientos de la raíz
+    progreso_ia = None # ProgresoIA de esa búsqueda
+    profundidad_mostrada = 0 # Profundidad que indica el aviso de "Pensando..." ahora mismo
 
     estado_juego_actual = MENU_STATE
 
     juego_actual = None
     movimientos_legales = []
+    resaltados_por_origen = {} # Resaltados de los movimientos legales agrupados por casilla de origen
+    piezas_en_tablero = [] # Piezas del tablero listas para dibujar (ver listar_piezas)
     movimiento_hecho = False
-    sq_seleccionado = ()
-    clicks_jugador = []
-    pieza_arrastrando = None
-    pos_original_arrastrando = ()
+    sel = Seleccion() # Casilla seleccionada y pieza arrastrada por el jugador
+
+    # Solo se redibuja (y se hace flip) cuando algo ha cambiado desde el último fotograma.
+    redibujar = True
+    boton_hover = None # Botón del menú bajo el ratón en el último dibujo del menú
+    pos_raton_menu = None # Posición del ratón con la que se calculó boton_hover
+    # Durante un arrastre se guarda el fotograma sin la pieza arrastrada, y solo se actualizan
+    # en pantalla la zona que ocupaba la pieza y la que ocupa ahora.
+    cuadro_arrastre = None
+    rect_arrastre = None
+    pos_cursor = (0, 0) # Última posición del ratón recibida en un evento, usada para dibujar el arrastre
 
     corriendo = True
 
     while corriendo:
-        turno_ia = (juego_actual and juego_actual.turno_blancas and not JUGADOR_HUMANO_BLANCAS) or \
-                   (juego_actual and not juego_actual.turno_blancas and not JUGADOR_HUMANO_NEGRAS)
+        turno_ia = es_turno_ia(juego_actual)
 
+        # Se vacía la cola una sola vez por fotograma; los tipos bloqueados ya no llegan hasta aquí.
         for evento in pygame.event.get():
+            redibujar = True # Todos los eventos que llegan pueden cambiar lo que se ve
+            if evento.type != pygame.MOUSEMOTION:
+                cuadro_arrastre = None # Solo el movimiento del ratón puede resolverse con la actualización parcial
             if evento.type == pygame.QUIT:
                 corriendo = False
+            elif evento.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                pos_cursor = evento.pos # Los eventos del ratón ya traen la posición; no hace falta preguntar a SDL
 
             if estado_juego_actual == MENU_STATE:
                 if evento.type == pygame.MOUSEBUTTONDOWN:
                     if evento.button == 1:
-                        nuevo_estado = manejar_clicks_menu(pygame.mouse.get_pos())
+                        nuevo_estado = manejar_clicks_menu(evento.pos)
                         if nuevo_estado == GAME_STATE:
                             estado_juego_actual = GAME_STATE
                             juego_actual = chess_engine.EstadoJuego()
+                            chess_ai.nueva_partida() # Las tablas de la IA de la partida anterior ya no sirven
                             movimientos_legales = juego_actual.obtener_movimientos_legales()
+                            resaltados_por_origen = indexar_resaltados_por_origen(movimientos_legales)
+                            piezas_en_tablero = listar_piezas(juego_actual.tablero)
                             juego_actual.actualizar_pins_y_checks()
 
                             # --- DEBUGGING: Mensajes iniciales más limpios ---
-                            print("\n--- INICIO DE JUEGO ---")
-                            print(f"Juego iniciado. Turno de las {'Blancas' if juego_actual.turno_blancas else 'Negras'}.")
+                            if DEBUG:
+                                print("\n--- INICIO DE JUEGO ---")
+                                print(f"Juego iniciado. Turno de las {'Blancas' if juego_actual.turno_blancas else 'Negras'}.")
                             # --- FIN DEBUGGING ---
 
                             movimiento_hecho = False
-                            sq_seleccionado = ()
-                            clicks_jugador = []
-                            pieza_arrastrando = None
-                            pos_original_arrastrando = ()
+                            sel.reset()
                         elif nuevo_estado == "QUIT":
                             corriendo = False
 
             elif estado_juego_actual == GAME_STATE:
-                if not juego_actual.jaque_mate and not juego_actual.ahogado and not turno_ia:
-                    if evento.type == pygame.MOUSEBUTTONDOWN:
+                if not juego_actual.jaque_mate and not juego_actual.ahogado:
+                    if evento.type == pygame.KEYDOWN and evento.key in (pygame.K_z, pygame.K_r, pygame.K_ESCAPE):
+                        # Las teclas también funcionan mientras la IA piensa: se descarta su búsqueda,
+                        # que quedaría calculada sobre una posición que ya no existe.
+                        if futuro_ia is not None:
+                            cancelar_ia.set() # La búsqueda termina sola en cuanto lo ve; no se la espera
+                            futuro_ia.cancel()
+                            futuro_ia = None
+
+                    if turno_ia and evento.type != pygame.KEYDOWN:
+                        pass # Los clicks se ignoran durante el turno de la IA
+                    elif evento.type == pygame.MOUSEBUTTONDOWN:
                         if evento.button == 1:
-                            pos_raton = pygame.mouse.get_pos()
+                            pos_raton = evento.pos
                             col_seleccionada = pos_raton[0] // TAMANIO_CASILLA
                             fila_seleccionada = pos_raton[1] // TAMANIO_CASILLA
 
@@ -194,23 +409,24 @@ def main():
                                 pieza_a_mover = juego_actual.tablero[fila_seleccionada][col_seleccionada]
                                 if (juego_actual.turno_blancas and pieza_a_mover[0] == 'w') or \
                                    (not juego_actual.turno_blancas and pieza_a_mover[0] == 'b'):
-                                    sq_seleccionado = (fila_seleccionada, col_seleccionada)
-                                    pieza_arrastrando = IMAGENES.get(pieza_a_mover) # Usa .get para evitar KeyError si la imagen no se cargó
-                                    pos_original_arrastrando = (col_seleccionada * TAMANIO_CASILLA, fila_seleccionada * TAMANIO_CASILLA)
-                                    clicks_jugador = [sq_seleccionado]
+                                    sel.sq = (fila_seleccionada, col_seleccionada)
+                                    sel.pieza = IMAGENES.get(pieza_a_mover) # Usa .get para evitar KeyError si la imagen no se cargó
+                                    sel.pos_original = (col_seleccionada * TAMANIO_CASILLA, fila_seleccionada * TAMANIO_CASILLA)
+                                    sel.clicks = [sel.sq]
+                                    pygame.event.set_allowed(pygame.MOUSEMOTION) # Solo interesa el movimiento del ratón durante el arrastre
 
                     elif evento.type == pygame.MOUSEBUTTONUP:
                         if evento.button == 1:
-                            if pieza_arrastrando:
-                                pos_raton = pygame.mouse.get_pos()
+                            if sel.pieza:
+                                pos_raton = evento.pos
                                 col_destino = pos_raton[0] // TAMANIO_CASILLA
                                 fila_destino = pos_raton[1] // TAMANIO_CASILLA
 
                                 # Asegúrate de que la casilla de destino esté dentro de los límites del tablero
                                 if 0 <= fila_destino < DIMENSION and 0 <= col_destino < DIMENSION:
-                                    if sq_seleccionado != (fila_destino, col_destino):
-                                        clicks_jugador.append((fila_destino, col_destino))
-                                        movimiento = chess_engine.Movimiento(clicks_jugador[0], clicks_jugador[1], juego_actual.tablero)
+                                    if sel.sq != (fila_destino, col_destino):
+                                        sel.clicks.append((fila_destino, col_destino))
+                                        movimiento = chess_engine.Movimiento(sel.clicks[0], sel.clicks[1], juego_actual.tablero)
 
                                         # --- DEBUGGING: Imprimir movimiento intentado ---
                                         # print(f"Intento de movimiento: {movimiento}")
@@ -225,104 +441,142 @@ def main():
                                     # Si el click final está fuera del tablero, considerar como un intento de cancelar el arrastre
                                     pass
 
-                                sq_seleccionado = ()
-                                clicks_jugador = []
-                                pieza_arrastrando = None
-                                pos_original_arrastrando = ()
+                                sel.reset()
+                                pygame.event.set_blocked(pygame.MOUSEMOTION)
                             else:
-                                pos_raton = pygame.mouse.get_pos()
+                                pos_raton = evento.pos
                                 col_clic = pos_raton[0] // TAMANIO_CASILLA
                                 fila_clic = pos_raton[1] // TAMANIO_CASILLA
 
                                 # Asegúrate de que la casilla clickeada esté dentro de los límites del tablero
                                 if 0 <= fila_clic < DIMENSION and 0 <= col_clic < DIMENSION:
-                                    if sq_seleccionado == (fila_clic, col_clic):
-                                        sq_seleccionado = ()
-                                        clicks_jugador = []
+                                    if sel.sq == (fila_clic, col_clic):
+                                        sel.reset()
                                     else:
-                                        sq_seleccionado = (fila_clic, col_clic)
-                                        clicks_jugador = [sq_seleccionado]
+                                        sel.sq = (fila_clic, col_clic)
+                                        sel.clicks = [sel.sq]
                                 # --- DEBUGGING: Imprimir movimientos legales de la pieza seleccionada (opcional) ---
-                                # if sq_seleccionado != ():
-                                #     pieza_en_sq = juego_actual.tablero[sq_seleccionado[0]][sq_seleccionado[1]]
-                                #     print(f"Casilla seleccionada: {sq_seleccionado}, Pieza: {pieza_en_sq}")
+                                # if sel.sq != ():
+                                #     pieza_en_sq = juego_actual.tablero[sel.sq[0]][sel.sq[1]]
+                                #     print(f"Casilla seleccionada: {sel.sq}, Pieza: {pieza_en_sq}")
                                 #     movs_para_pieza_seleccionada = [
                                 #         mov for mov in movimientos_legales
-                                #         if mov.fila_inicial == sq_seleccionado[0] and mov.col_inicial == sq_seleccionado[1]
+                                #         if mov.fila_inicial == sel.sq[0] and mov.col_inicial == sel.sq[1]
                                 #     ]
-                                #     print(f"Movimientos legales para {pieza_en_sq} en {sq_seleccionado}: {len(movs_para_pieza_seleccionada)}")
+                                #     print(f"Movimientos legales para {pieza_en_sq} en {sel.sq}: {len(movs_para_pieza_seleccionada)}")
                                 # --- FIN DEBUGGING ---
 
-                    elif evento.type == pygame.MOUSEMOTION:
-                        if pieza_arrastrando:
-                            # No se necesita lógica adicional aquí, el dibujo se encarga.
-                            pass
-
                     elif evento.type == pygame.KEYDOWN:
                         if evento.key == pygame.K_z:
                             juego_actual.deshacer_movimiento()
                             movimiento_hecho = True
-                            sq_seleccionado = ()
-                            clicks_jugador = []
-                            pieza_arrastrando = None
-                            pos_original_arrastrando = ()
-                            print("Movimiento deshecho.")
+                            sel.reset()
+                            pygame.event.set_blocked(pygame.MOUSEMOTION)
+                            logger.info("Movimiento deshecho.")
                         if evento.key == pygame.K_r:
                             juego_actual = chess_engine.EstadoJuego()
+                            chess_ai.nueva_partida() # Las tablas de la IA de la partida anterior ya no sirven
                             movimientos_legales = juego_actual.obtener_movimientos_legales()
+                            resaltados_por_origen = indexar_resaltados_por_origen(movimientos_legales)
+                            piezas_en_tablero = listar_piezas(juego_actual.tablero)
                             juego_actual.actualizar_pins_y_checks()
-                            sq_seleccionado = ()
-                            clicks_jugador = []
                             movimiento_hecho = False
-                            pieza_arrastrando = None
-                            pos_original_arrastrando = ()
-                            print("Juego reiniciado.")
+                            sel.reset()
+                            pygame.event.set_blocked(pygame.MOUSEMOTION)
+                            logger.info("Juego reiniciado.")
                         if evento.key == pygame.K_ESCAPE:
                             estado_juego_actual = MENU_STATE
                             juego_actual = None
                             movimientos_legales = []
+                            resaltados_por_origen = {}
+                            piezas_en_tablero = []
                             movimiento_hecho = False
-                            sq_seleccionado = ()
-                            clicks_jugador = []
-                            pieza_arrastrando = None
-                            pos_original_arrastrando = ()
-                            print("Volviendo al menú principal.")
+                            sel.reset()
+                            pygame.event.set_blocked(pygame.MOUSEMOTION)
+                            logger.info("Volviendo al menú principal.")
 
         # --- LÓGICA DE LA IA ---
-        if estado_juego_actual == GAME_STATE and not juego_actual.jaque_mate and not juego_actual.ahogado and turno_ia:
-            print("IA pensando...")
-
-            movimiento_ia = chess_ai.find_best_move(juego_actual)
-
-            if movimiento_ia:
-                print(f"La IA hará el movimiento: {movimiento_ia}")
-                juego_actual.hacer_movimiento(movimiento_ia)
-                movimiento_hecho = True
+        # Se recalcula el turno por si una tecla acaba de cambiar la partida en este fotograma.
+        turno_ia = es_turno_ia(juego_actual)
+        if estado_juego_actual == GAME_STATE and not juego_actual.jaque_mate and not juego_actual.ahogado and turno_ia \
+                and not movimiento_hecho:
+            if futuro_ia is None:
+                if DEBUG:
+                    print("IA pensando...")
+                # Se le pasa una copia para que la búsqueda no toque el estado que se está dibujando.
+                cancelar_ia = threading.Event()
+                progreso_ia = ProgresoIA()
+                profundidad_mostrada = 0
+                futuro_ia = ejecutor_ia.submit(chess_ai.find_best_move, copy.deepcopy(juego_actual),
+                                               cancelar_ia, progreso_ia.actualizar)
+                redibujar = True # Para mostrar el aviso de "Pensando..."
+            elif not futuro_ia.done():
+                if progreso_ia.profundidad != profundidad_mostrada:
+                    profundidad_mostrada = progreso_ia.profundidad
+                    redibujar = True # Actualiza el progreso del aviso de "Pensando..."
             else:
-                print("IA no encontró movimientos válidos o el juego terminó (inesperado).")
+                movimiento_ia = futuro_ia.result()
+                futuro_ia = None
+
+                # El movimiento viene de la copia; se usa el objeto equivalente de la lista legal actual.
+                if movimiento_ia in movimientos_legales:
+                    movimiento_ia = movimientos_legales[movimientos_legales.index(movimiento_ia)]
+                    logger.info("La IA hará el movimiento: %s", movimiento_ia)
+                    juego_actual.hacer_movimiento(movimiento_ia)
+                    movimiento_hecho = True
+                else:
+                    logger.warning("IA no encontró movimientos válidos o el juego terminó (inesperado).")
+
+                if DEBUG:
+                    print("IA terminó de pensar.")
+                redibujar = True
+
+        if estado_juego_actual == GAME_STATE and movimiento_hecho:
+            movimientos_legales = juego_actual.obtener_movimientos_legales()
+            resaltados_por_origen = indexar_resaltados_por_origen(movimientos_legales)
+            piezas_en_tablero = listar_piezas(juego_actual.tablero)
+            movimiento_hecho = False
+            juego_actual.actualizar_pins_y_checks()
+            redibujar = True
+            cuadro_arrastre = None
+
+            # --- DEBUGGING: Mensajes de turno más limpios ---
+            if DEBUG:
+                print(f"Turno de las {'Blancas' if juego_actual.turno_blancas else 'Negras'}.")
+            # --- FIN DEBUGGING ---
 
-            print("IA terminó de pensar.")
+            if len(movimientos_legales) == 0:
+                if juego_actual.jaque:
+                    juego_actual.jaque_mate = True
+                else:
+                    juego_actual.ahogado = True
 
-        # --- Lógica de Dibujo según el estado del juego ---
         if estado_juego_actual == MENU_STATE:
-            dibujar_menu(pantalla)
-        elif estado_juego_actual == GAME_STATE:
-            if movimiento_hecho:
-                movimientos_legales = juego_actual.obtener_movimientos_legales()
-                movimiento_hecho = False
-                juego_actual.actualizar_pins_y_checks()
-
-                # --- DEBUGGING: Mensajes de turno más limpios ---
-                print(f"Turno de las {'Blancas' if juego_actual.turno_blancas else 'Negras'}.")
-                # --- FIN DEBUGGING ---
-
-                if len(movimientos_legales) == 0:
-                    if juego_actual.jaque:
-                        juego_actual.jaque_mate = True
-                    else:
-                        juego_actual.ahogado = True
+            # El ratón no genera eventos en el menú, así que el cambio de hover se comprueba aquí,
+            # y solo se vuelven a probar los botones si el ratón se ha movido.
+            pos_raton = pygame.mouse.get_pos()
+            if pos_raton != pos_raton_menu:
+                pos_raton_menu = pos_raton
+                hover_actual = boton_bajo_raton(pos_raton)
+                if hover_actual is not boton_hover:
+                    boton_hover = hover_actual
+                    redibujar = True
 
-            dibujar_estado_juego(pantalla, juego_actual, sq_seleccionado, movimientos_legales, pieza_arrastrando, pos_original_arrastrando)
+        # --- Lógica de Dibujo según el estado del juego ---
+        if not redibujar:
+            pass
+        elif estado_juego_actual == MENU_STATE:
+            dibujar_menu(pantalla, boton_hover)
+            redibujar = False
+        elif estado_juego_actual == GAME_STATE and sel.pieza and cuadro_arrastre is not None:
+            # Arrastre en curso: se restaura la zona anterior de la pieza y se dibuja en la nueva.
+            pantalla.blit(cuadro_arrastre, rect_arrastre, rect_arrastre)
+            rect_nuevo = dibujar_pieza_arrastrada(pantalla, sel.pieza, pos_cursor)
+            pygame.display.update([rect_arrastre, rect_nuevo])
+            rect_arrastre = rect_nuevo
+            redibujar = False
+        elif estado_juego_actual == GAME_STATE:
+            dibujar_estado_juego(pantalla, juego_actual, sel, resaltados_por_origen, piezas_en_tablero)
 
             if juego_actual.jaque_mate:
                 texto_jaque_mate = "JAQUE MATE! " + ("Blancas Ganan" if not juego_actual.turno_blancas else "Negras Ganan")
@@ -331,60 +585,76 @@ def main():
                 dibujar_texto_centro(pantalla, "TABLAS por AHOGADO!", color_texto=pygame.Color('Blue')) # Texto azul para ahogado
             elif juego_actual.jaque:
                 dibujar_texto_centro(pantalla, "¡JAQUE!", color_texto=pygame.Color('Orange')) # Texto naranja para jaque
+            elif futuro_ia is not None:
+                dibujar_texto_centro(pantalla, f"Pensando... {profundidad_mostrada + 1}/{chess_ai.PROFUNDIDAD_BUSQUEDA}")
 
-            pygame.display.flip()
-
-        reloj.tick(FPS_MAX)
-
+            if sel.pieza:
+                # La pieza arrastrada va encima de todo; el fotograma sin ella se guarda para los siguientes movimientos.
+                cuadro_arrastre = pantalla.copy()
+                rect_arrastre = dibujar_pieza_arrastrada(pantalla, sel.pieza, pos_cursor)
 
-def dibujar_estado_juego(pantalla, juego, sq_seleccionado, movimientos_legales, pieza_arrastrando, pos_original_arrastrando):
+            pygame.display.flip()
+            redibujar = False
+
+        # tick() duerme con SDL_Delay, que puede desviarse varios milisegundos; tick_busy_loop() es preciso
+        # pero mantiene ocupado un núcleo, así que solo se usa mientras se arrastra una pieza.
+        if sel.pieza:
+            reloj.tick_busy_loop(FPS_MAX)
+        elif estado_juego_actual == GAME_STATE and not juego_actual.jaque_mate and not juego_actual.ahogado:
+            reloj.tick(FPS_MAX)
+        else:
+            reloj.tick(FPS_REPOSO)
+
+    # Una búsqueda pendiente se cancela, y se espera a que pare (lo hace entre movimientos de la raíz)
+    # antes de cerrar los procesos que puede estar usando.
+    if futuro_ia is not None:
+        cancelar_ia.set()
+    ejecutor_ia.shutdown(wait=True, cancel_futures=True)
+    chess_ai.cerrar_procesos()
+
+
+def dibujar_estado_juego(pantalla, juego, sel, resaltados_por_origen, piezas_en_tablero):
     """
     Coordina el dibujo de todos los elementos visuales del tablero de ajedrez.
+    La pieza que se está arrastrando no se dibuja aquí (ver dibujar_pieza_arrastrada).
     Args:
         pantalla (pygame.Surface): La superficie de Pygame donde se dibujará.
         juego (chess_engine.EstadoJuego): El objeto que contiene el estado actual del juego.
-        sq_seleccionado (tuple): Casilla (fila, col) seleccionada por el jugador.
-        movimientos_legales (list): Lista de objetos Movimiento que son legales para el turno actual.
-        pieza_arrastrando (pygame.Surface): La imagen de la pieza que se está arrastrando (None si no hay).
-        pos_original_arrastrando (tuple): Posición (x, y) original de la pieza que se arrastra.
+        sel (Seleccion): Casilla seleccionada y pieza arrastrada por el jugador.
+        resaltados_por_origen (dict): Resaltados de los movimientos legales agrupados por casilla de origen.
+        piezas_en_tablero (list): Piezas del tablero preparadas por listar_piezas().
     """
-    dibujar_tablero(pantalla)
-    resaltar_casillas(pantalla, juego, sq_seleccionado, movimientos_legales)
-    dibujar_piezas(pantalla, juego.tablero, pieza_arrastrando, sq_seleccionado, pos_original_arrastrando)
-    dibujar_etiquetas_filas_columnas(pantalla) # Dibujar etiquetas al final para que estén por encima de todo
+    pantalla.blit(FONDO_TABLERO, (0, 0)) # Casillas precalculadas en construir_fondo_tablero()
+    resaltar_casillas(pantalla, juego, sel.sq, resaltados_por_origen)
+    dibujar_piezas(pantalla, piezas_en_tablero, sel)
+    pantalla.blit(CAPA_ETIQUETAS, (0, 0)) # Etiquetas al final para que estén por encima de todo
 
 
 def dibujar_tablero(pantalla):
     """
     Dibuja las casillas alternadas del tablero de ajedrez.
+    Se usa al construir FONDO_TABLERO, no en cada fotograma.
     Args:
         pantalla (pygame.Surface): La superficie de Pygame donde se dibujará.
     """
+    # Se rellena todo con el color claro y después solo las 32 casillas oscuras;
+    # fill() copia un bloque de color directamente, sin pasar por el rasterizado de draw.rect().
+    pantalla.fill(COLOR_CLARO)
     for fila in range(DIMENSION):
-        for col in range(DIMENSION):
-            color = COLOR_CLARO if (fila + col) % 2 == 0 else COLOR_OSCURO
-            pygame.draw.rect(pantalla, color, pygame.Rect(col * TAMANIO_CASILLA, fila * TAMANIO_CASILLA, TAMANIO_CASILLA, TAMANIO_CASILLA))
+        for col in range(1 - fila % 2, DIMENSION, 2):
+            pantalla.fill(COLOR_OSCURO, (col * TAMANIO_CASILLA, fila * TAMANIO_CASILLA, TAMANIO_CASILLA, TAMANIO_CASILLA))
 
 
 def dibujar_etiquetas_filas_columnas(pantalla):
     """
     Dibuja las etiquetas numéricas (1-8) y alfabéticas (a-h) alrededor del tablero.
-    Incluye un fondo semitransparente para mayor legibilidad.
+    Se usa al construir CAPA_ETIQUETAS, no en cada fotograma, y copia los textos de ETIQUETAS_SURFS.
     Args:
         pantalla (pygame.Surface): La superficie de Pygame donde se dibujará.
     """
-    fuente = pygame.font.SysFont("Arial", 14, bold=True) # Fuente un poco más moderna para las etiquetas
-
-    # Crea una superficie para el fondo de las etiquetas (para dibujar una sola vez y usarla)
-    # Suponemos que el tamaño máximo de una etiqueta será de 20x20 píxeles, ajusta si es necesario
-    fondo_etiqueta_surf = pygame.Surface((20, 20), pygame.SRCALPHA)
-    fondo_etiqueta_surf.fill(COLOR_FONDO_ETIQUETA) # Color de fondo semi-transparente
-
-
     # Etiquetas de columnas (a-h)
     for col in range(DIMENSION):
-        letra = chr(ord('a') + col)
-        texto_obj = fuente.render(letra, True, (240, 240, 240)) # Blanco grisáceo para mejor contraste
+        texto_obj = ETIQUETAS_SURFS[chr(ord('a') + col)]
 
         # Inferior (para blancas)
         pos_x_inferior = col * TAMANIO_CASILLA + TAMANIO_CASILLA // 2
@@ -401,8 +671,7 @@ def dibujar_etiquetas_filas_columnas(pantalla):
 
     # Etiquetas de filas (1-8)
     for fila in range(DIMENSION):
-        numero = str(8 - fila)
-        texto_obj = fuente.render(numero, True, (240, 240, 240)) # Blanco grisáceo
+        texto_obj = ETIQUETAS_SURFS[str(8 - fila)]
 
         # Derecha (para blancas)
         pos_x_derecha = ANCHO_PANTALLA - 15
@@ -417,7 +686,7 @@ def dibujar_etiquetas_filas_columnas(pantalla):
         pantalla.blit(texto_obj, rect_izquierda)
 
 
-def resaltar_casillas(pantalla, juego, sq_seleccionado, movimientos_legales):
+def resaltar_casillas(pantalla, juego, sq_seleccionado, resaltados_por_origen):
     """
     Resalta la casilla actualmente seleccionada por el jugador y las casillas
     a las que la pieza seleccionada puede moverse legalmente.
@@ -426,7 +695,7 @@ def resaltar_casillas(pantalla, juego, sq_seleccionado, movimientos_legales):
         pantalla (pygame.Surface): La superficie de Pygame donde se dibujará.
         juego (chess_engine.EstadoJuego): El objeto que contiene el estado actual del juego.
         sq_seleccionado (tuple): Casilla (fila, col) seleccionada por el jugador.
-        movimientos_legales (list): Lista de objetos Movimiento que son legales para el turno actual.
+        resaltados_por_origen (dict): Resaltados de los movimientos legales agrupados por casilla de origen.
     """
     # Resaltar la casilla seleccionada.
     if sq_seleccionado != ():
@@ -436,20 +705,11 @@ def resaltar_casillas(pantalla, juego, sq_seleccionado, movimientos_legales):
             pieza_seleccionada = juego.tablero[fila][col]
             if (juego.turno_blancas and pieza_seleccionada[0] == 'w') or \
                (not juego.turno_blancas and pieza_seleccionada[0] == 'b'):
-                s = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA)
-                s.fill(COLOR_RESALTE)
-                pantalla.blit(s, (col * TAMANIO_CASILLA, fila * TAMANIO_CASILLA))
+                pantalla.blit(SURF_SELECCION, (col * TAMANIO_CASILLA, fila * TAMANIO_CASILLA))
 
                 # Resaltar movimientos legales posibles desde la casilla seleccionada.
-                for movimiento in movimientos_legales:
-                    if movimiento.fila_inicial == fila and movimiento.col_inicial == col:
-                        color_indicador_actual = COLOR_MOVIMIENTO_NORMAL
-                        if juego.tablero[movimiento.fila_final][movimiento.col_final] != "--":
-                            color_indicador_actual = COLOR_MOVIMIENTO_CAPTURAS
-
-                        s_mov = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA)
-                        s_mov.fill(color_indicador_actual)
-                        pantalla.blit(s_mov, (movimiento.col_final * TAMANIO_CASILLA, movimiento.fila_final * TAMANIO_CASILLA))
+                # Las superficies y posiciones ya vienen calculadas en indexar_resaltados_por_origen().
+                pantalla.blits(resaltados_por_origen.get(sq_seleccionado, ()), doreturn=False)
 
     # Resaltar el rey si está en jaque.
     if juego.jaque:
@@ -461,39 +721,38 @@ def resaltar_casillas(pantalla, juego, sq_seleccionado, movimientos_legales):
         else: # Si no hay rey válido o no está en jaque, no hacer nada
             return
 
-        s_jaque = pygame.Surface((TAMANIO_CASILLA, TAMANIO_CASILLA), pygame.SRCALPHA)
-        s_jaque.fill(COLOR_JAQUE)
-        pantalla.blit(s_jaque, (col_rey * TAMANIO_CASILLA, fila_rey * TAMANIO_CASILLA))
+        pantalla.blit(SURF_JAQUE, (col_rey * TAMANIO_CASILLA, fila_rey * TAMANIO_CASILLA))
 
 
-def dibujar_piezas(pantalla, tablero, pieza_arrastrando, sq_seleccionado, pos_original_arrastrando):
+def dibujar_piezas(pantalla, piezas_en_tablero, sel):
     """
     Dibuja todas las piezas en el tablero.
-    Maneja el arrastre visual de una pieza si el jugador está moviendo una.
+    Si el jugador está arrastrando una pieza, la deja fuera de su casilla de origen.
     Args:
         pantalla (pygame.Surface): La superficie de Pygame donde se dibujará.
-        tablero (list): La representación 2D del tablero de ajedrez.
-        pieza_arrastrando (pygame.Surface): La imagen de la pieza que se está arrastrando (None si no hay).
-        sq_seleccionado (tuple): La casilla (fila, col) de la pieza que se está arrastrando.
-        pos_original_arrastrando (tuple): La posición (x, y) en píxeles de la casilla de origen de la pieza arrastrada.
+        piezas_en_tablero (list): Piezas del tablero preparadas por listar_piezas().
+        sel (Seleccion): Casilla seleccionada y pieza arrastrada por el jugador.
     """
-    for fila in range(DIMENSION):
-        for col in range(DIMENSION):
-            pieza = tablero[fila][col]
-            if pieza != "--":
-                # No dibujamos la pieza en su posición original si se está arrastrando,
-                # ya que se dibujará por separado sobre el cursor del ratón.
-                if pieza_arrastrando and sq_seleccionado == (fila, col):
-                    continue
-                # Asegúrate de que la imagen exista en IMAGENES antes de intentar dibujarla
-                if pieza in IMAGENES:
-                    pantalla.blit(IMAGENES[pieza], pygame.Rect(col * TAMANIO_CASILLA, fila * TAMANIO_CASILLA, TAMANIO_CASILLA, TAMANIO_CASILLA))
-
-    # Dibujar la pieza que se está arrastrando por encima de todas las demás.
-    if pieza_arrastrando:
-        pos_raton = pygame.mouse.get_pos()
-        # Ajusta la posición de dibujo para que el centro de la pieza esté en el cursor.
-        pantalla.blit(pieza_arrastrando, (pos_raton[0] - TAMANIO_CASILLA // 2, pos_raton[1] - TAMANIO_CASILLA // 2))
+    for sq, imagen, pos in piezas_en_tablero:
+        # No dibujamos la pieza en su posición original si se está arrastrando,
+        # ya que se dibujará por separado sobre el cursor del ratón.
+        if sel.pieza and sq == sel.sq:
+            continue
+        pantalla.blit(imagen, pos)
+
+
+def dibujar_pieza_arrastrada(pantalla, pieza_arrastrando, pos_raton):
+    """
+    Dibuja la pieza que se está arrastrando centrada en el cursor, por encima de todo lo demás.
+    Args:
+        pantalla (pygame.Surface): La superficie de Pygame donde se dibujará.
+        pieza_arrastrando (pygame.Surface): La imagen de la pieza que se está arrastrando.
+        pos_raton (tuple): Posición (x, y) actual del ratón.
+    Returns:
+        pygame.Rect: La zona de la pantalla que ha cambiado, ya recortada a los límites de la ventana.
+    """
+    # Ajusta la posición de dibujo para que el centro de la pieza esté en el cursor.
+    return pantalla.blit(pieza_arrastrando, (pos_raton[0] - TAMANIO_CASILLA // 2, pos_raton[1] - TAMANIO_CASILLA // 2))
 
 
 def dibujar_texto_centro(pantalla, texto, color_texto=None):
@@ -504,23 +763,33 @@ def dibujar_texto_centro(pantalla, texto, color_texto=None):
         pantalla (pygame.Surface): La superficie de Pygame donde se dibujará.
         texto (str): El texto a mostrar.
         color_texto (pygame.Color, optional): Color del texto. Por defecto, blanco.
+    El texto y su fondo se preparan la primera vez y se guardan en BANNERS,
+    porque el mismo aviso se queda en pantalla durante muchos fotogramas.
     """
     if color_texto is None:
         color_texto = pygame.Color('White') # Color de texto predeterminado si no se especifica
 
-    fuente = pygame.font.SysFont("Arial", 40, True, False) # Fuente más grande y moderna para mensajes
-    texto_obj = fuente.render(texto, True, color_texto)
-    texto_rect = texto_obj.get_rect(center=(ANCHO_PANTALLA // 2, ALTO_PANTALLA // 2))
+    clave = (texto, tuple(color_texto))
+    banner = BANNERS.get(clave)
+    if banner is None:
+        texto_obj = FUENTE_BANNER.render(texto, True, color_texto)
+        texto_rect = texto_obj.get_rect(center=(ANCHO_PANTALLA // 2, ALTO_PANTALLA // 2))
+
+        # Fondo semitransparente y ligeramente más grande que el texto
+        s = pygame.Surface((texto_rect.width + 40, texto_rect.height + 30), pygame.SRCALPHA) # Más padding
+        s.fill((0, 0, 0, 180))  # Fondo negro con mayor opacidad
 
-    # Dibuja un fondo semitransparente y ligeramente más grande que el texto
-    s = pygame.Surface((texto_rect.width + 40, texto_rect.height + 30), pygame.SRCALPHA) # Más padding
-    s.fill((0, 0, 0, 180))  # Fondo negro con mayor opacidad
+        banner = (s, (texto_rect.left - 20, texto_rect.top - 15), texto_obj, texto_rect) # Ajusta para el padding
+        BANNERS[clave] = banner
 
     # Dibuja el fondo centrado y luego el texto
-    pantalla.blit(s, (texto_rect.left - 20, texto_rect.top - 15)) # Ajusta para el padding
+    s, pos_fondo, texto_obj, texto_rect = banner
+    pantalla.blit(s, pos_fondo)
     pantalla.blit(texto_obj, texto_rect)
 
 
 # Ejecutar el juego si este archivo es el script principal.
 if __name__ == "__main__":
+    # La IA puede buscar en varios procesos (ver chess_ai.PROCESOS_RAIZ); necesario si se empaqueta como ejecutable.
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -1,27 +1,119 @@
 # chess_ai.py
 
+import os
 import random
-
-# Valores de las piezas para la función de evaluación.
-# Estos son valores heurísticos comunes.
-PIECE_SCORES = {
-    'p': 10,    # Peón
-    'n': 30,    # Caballo
-    'b': 30,    # Alfil
-    'r': 50,    # Torre
-    'q': 90,    # Reina
-    'k': 0      # Rey (su valor es 0 porque es el objetivo, no una pieza a ganar)
-}
-
-# Variable global para almacenar el movimiento que la IA elegirá.
-# Se inicializa a None y se actualiza en la llamada inicial de minimax.
-PROXIMO_MOVIMIENTO_IA = None
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from chess_engine import PIECE_SCORES # Valores de las piezas; el motor los usa para la evaluación
 
 # Constante para la profundidad de búsqueda de la IA.
 # PROFUNDIDAD_BUSQUEDA se sugiere como 2 o 3 para un rendimiento razonable.
 # Valores más altos hacen la IA más fuerte pero más lenta.
 PROFUNDIDAD_BUSQUEDA = 3 # Se ajusta según el rendimiento deseado de la IA.
 
+# --- Búsqueda paralela en la raíz ---
+# A partir de PROFUNDIDAD_PARALELA, la raíz busca su primer movimiento en este proceso (para tener
+# un alpha con el que podar) y reparte el resto en un lote por cada uno de los PROCESOS_RAIZ procesos
+# ("Young Brothers Wait"). Se deja un núcleo libre para la interfaz; con un solo núcleo disponible, todo es secuencial.
+# Solo compensa cuando cada iteración tarda varios segundos: arrancar los procesos con "spawn" cuesta unos 0,7 s
+# y cada uno empieza con la TT y la caché vacías. A la profundidad con la que juega la IA salía más lenta
+# (Kiwipete a profundidad 3: 0,73 s en paralelo frente a 0,46 s secuencial; a profundidad 4 ya tarda unos 2,6 s
+# secuencial), así que queda por encima de PROFUNDIDAD_BUSQUEDA y solo entra en juego si se sube esta.
+PROFUNDIDAD_PARALELA = 5
+PROCESOS_RAIZ = max(1, (os.cpu_count() or 1) - 1)
+EJECUTOR_PROCESOS = None # ProcessPoolExecutor, creado la primera vez que hace falta
+# Cada llamada a find_best_move es una búsqueda con su ID_BUSQUEDA. BUSQUEDA_EN_CURSO es un multiprocessing.Value
+# compartido con los procesos (creado con el ejecutor) con el ID de la búsqueda cuyos encargos siguen valiendo,
+# o 0 si se canceló: así los procesos se saltan los encargos atrasados de una búsqueda cancelada que aún
+# estaban en la cola. En cada proceso, BUSQUEDA_PROCESO es la última búsqueda para la que preparó sus tablas.
+ID_BUSQUEDA = 0
+BUSQUEDA_EN_CURSO = None
+BUSQUEDA_PROCESO = None
+
+# --- Tabla de Transposición ---
+# Guarda, por hash Zobrist de la posición (EstadoJuego.zobrist), el resultado de haberla buscado:
+# TT[zobrist] = (profundidad, valor, tipo, mejor_movimiento).
+# El tipo indica si el valor es exacto o solo una cota, porque la poda Alpha-Beta corta la búsqueda
+# en cuanto el valor sale de la ventana (alpha, beta).
+TT = {}
+TT_EXACTO = 0    # El valor es el minimax exacto de la posición
+TT_INFERIOR = 1  # El valor real es >= valor (la búsqueda cortó por beta)
+TT_SUPERIOR = 2  # El valor real es <= valor (ningún movimiento superó alpha)
+TT_MAX_ENTRADAS = 500000 # Si la tabla crece más, se vacía al empezar la siguiente búsqueda
+
+# --- Caché de movimientos legales ---
+# Generar los movimientos legales es lo más caro de la búsqueda, y la profundización iterativa vuelve a
+# visitar las mismas posiciones en cada iteración. Se guardan por hash Zobrist:
+# CACHE_MOVIMIENTOS[zobrist] = (tupla de movimientos, jaque_mate, ahogado, jaque).
+# La tupla no se modifica nunca; quien la pide recibe una lista nueva que puede ordenar.
+CACHE_MOVIMIENTOS = {}
+# Cada entrada guarda todos los Movimiento de la posición (unos 5-6 KB), mucho más que una entrada de la TT,
+# así que se vacía en cuanto se llena (no al empezar la búsqueda; una sola puede llenarla): con este límite,
+# unos 30 MB por proceso. Una búsqueda a profundidad 3 en Kiwipete guarda unas 4000 posiciones.
+CACHE_MAX_ENTRADAS = 5000
+
+# Las tablas (TT y CACHE_MOVIMIENTOS) no sirven de una partida a otra. La interfaz llama a nueva_partida()
+# al empezar cada una, y la siguiente búsqueda las vacía al ver que ID_PARTIDA ha cambiado. La interfaz no
+# las vacía directamente porque la búsqueda anterior puede seguir usándolas en su hilo hasta que se cancela.
+ID_PARTIDA = 0
+PARTIDA_TABLAS = 0 # ID_PARTIDA de cuando se llenaron las tablas
+
+def obtener_movimientos(estado_juego):
+    """
+    Devuelve los movimientos legales del estado, usando CACHE_MOVIMIENTOS si la posición ya se generó.
+    Como obtener_movimientos_legales, deja marcados estado_juego.jaque_mate y estado_juego.ahogado,
+    y también estado_juego.jaque (que la búsqueda de quiescencia necesita al día).
+    La búsqueda hace los movimientos sin recalcular jaques (hacer_movimiento(..., False)): si hay que
+    generar los movimientos, se recalculan aquí, y si la caché o la TT resuelven la posición, no hace falta.
+    :param estado_juego: El estado actual del juego.
+    :return: Lista nueva con los movimientos legales.
+    """
+    clave = estado_juego.zobrist
+    entrada = CACHE_MOVIMIENTOS.get(clave)
+    if entrada is not None:
+        movimientos, estado_juego.jaque_mate, estado_juego.ahogado, estado_juego.jaque = entrada
+        return list(movimientos)
+    estado_juego.actualizar_pins_y_checks()
+    movimientos = estado_juego.obtener_movimientos_legales()
+    if len(CACHE_MOVIMIENTOS) >= CACHE_MAX_ENTRADAS:
+        CACHE_MOVIMIENTOS.clear()
+    CACHE_MOVIMIENTOS[clave] = (tuple(movimientos), estado_juego.jaque_mate, estado_juego.ahogado, estado_juego.jaque)
+    return movimientos
+
+# --- Ordenación de movimientos ---
+# La poda Alpha-Beta corta mucho más si los mejores movimientos se prueban primero.
+PUNTOS_MOVIMIENTO_TT = 10000000 # El mejor movimiento guardado en la TT para esta posición
+PUNTOS_CAPTURA = 1000000        # Capturas: además se suma MVV-LVA (víctima valiosa, atacante barato)
+PUNTOS_KILLER = 900000          # Movimientos tranquilos que ya provocaron un corte beta en el mismo ply
+# Valor del atacante para MVV-LVA. El rey vale 0 en PIECE_SCORES, pero como atacante es el último
+# que se quiere arriesgar, así que aquí se le da el valor más alto.
+VALOR_ATACANTE = dict(PIECE_SCORES, k=1000)
+# KILLERS[ply] guarda los dos últimos movimientos tranquilos que cortaron por beta en ese ply
+# (ply = distancia a la raíz). Se reinicia en cada búsqueda.
+KILLERS = [[None, None] for _ in range(PROFUNDIDAD_BUSQUEDA + 1)]
+
+# --- Puntuaciones de jaque mate ---
+PUNTUACION_MATE = 1000000000
+# "Infinito" para las ventanas alpha-beta: un entero mayor que cualquier puntuación, incluido un mate.
+# Con enteros todas las comparaciones y negaciones de la búsqueda son entre int, sin mezclar con INFINITO.
+INFINITO = 10 ** 18
+# Indexada por turno_blancas (False = 0, True = 1): el jugador al que le toca es el que está en jaque mate.
+MATE_POR_TURNO = (PUNTUACION_MATE, -PUNTUACION_MATE)
+# En la búsqueda, un mate a distancia ply de la raíz vale PUNTUACION_MATE - ply, para preferir los mates
+# más rápidos (y retrasar los propios). Cualquier valor por encima de LIMITE_MATE es un mate.
+LIMITE_MATE = PUNTUACION_MATE - 1000
+
+# --- Ventanas de aspiración ---
+# Desde la segunda iteración, la raíz se busca con una ventana estrecha alrededor de la puntuación de la
+# iteración anterior: con la ventana pequeña la poda corta mucho más. Si el resultado cae fuera, se vuelve
+# a buscar ensanchando ese lado (doblando el margen); pasado VENTANA_MAXIMA, ese lado queda abierto del todo.
+VENTANA_ASPIRACION = 50 # Medio peón
+VENTANA_MAXIMA = 1000
+
+# Se levanta para abandonar una iteración cuando la interfaz pide cancelar la búsqueda.
+class BusquedaCancelada(Exception):
+    pass
+
 # --- Función de Evaluación ---
 def evaluar_tablero(estado_juego):
     """
@@ -35,102 +127,452 @@ def evaluar_tablero(estado_juego):
     # Si hay jaque mate, devolver una puntuación extrema.
     # El jugador cuyo turno es (estado_juego.turno_blancas) es el que ha sido jaque mateado.
     if estado_juego.jaque_mate:
-        # Si las blancas están en jaque mate, las negras ganan, es una puntuación muy negativa para blancas.
-        # Si las negras están en jaque mate, las blancas ganan, es una puntuación muy positiva para blancas.
-        if estado_juego.turno_blancas: # Si las blancas están en jaque mate, significa que el turno era de las blancas
-            return -1000000000 # Jaque mate para blancas (pierden)
-        else: # Si las negras están en jaque mate
-            return 1000000000 # Jaque mate para negras (pierden)
+        return MATE_POR_TURNO[estado_juego.turno_blancas]
     elif estado_juego.ahogado:
         return 0 # Tablas por ahogado
 
-    score = 0
-    for fila in range(8):
-        for col in range(8):
-            pieza = estado_juego.tablero[fila][col]
-            if pieza != "--":
-                # Determinar el valor de la pieza
-                valor_pieza = PIECE_SCORES[pieza[1]] # 'p', 'n', 'b', etc.
-
-                # Sumar o restar según el color de la pieza
-                if pieza[0] == 'w': # Si es pieza blanca
-                    score += valor_pieza
-                elif pieza[0] == 'b': # Si es pieza negra
-                    score -= valor_pieza
-    return score
-
-# --- Implementación de Minimax con Poda Alpha-Beta (Optimización) ---
+    # El motor mantiene la suma de material y tablas de posición (blancas positivas, negras negativas)
+    # en cada movimiento (ver VALOR_CASILLA en chess_engine).
+    return estado_juego.eval_score
+
+def valor_a_tt(valor, ply):
+    """
+    Pasa una puntuación de mate de "distancia a la raíz" a "distancia a esta posición", que es como se guarda
+    en la TT: la misma posición puede aparecer a otro ply en otra búsqueda.
+    """
+    if valor > LIMITE_MATE:
+        return valor + ply
+    if valor < -LIMITE_MATE:
+        return valor - ply
+    return valor
+
+def valor_desde_tt(valor, ply):
+    """
+    Inversa de valor_a_tt: pasa una puntuación de mate de la TT a distancia a la raíz de la búsqueda actual.
+    """
+    if valor > LIMITE_MATE:
+        return valor - ply
+    if valor < -LIMITE_MATE:
+        return valor + ply
+    return valor
+
+def guardar_en_tt(clave, profundidad, ply, valor, alpha, beta, mejor_movimiento):
+    """
+    Guarda en la tabla de transposición el resultado de buscar una posición.
+    :param clave: Hash Zobrist de la posición.
+    :param profundidad: Profundidad restante con la que se buscó.
+    :param ply: Distancia a la raíz de la posición (para guardar los mates, ver valor_a_tt).
+    :param valor: Puntuación obtenida.
+    :param alpha: Valor de alpha con el que se empezó a buscar el nodo.
+    :param beta: Valor de beta con el que se empezó a buscar el nodo.
+    :param mejor_movimiento: El movimiento que dio la puntuación (None si no hubo ninguno).
+    """
+    if valor <= alpha:
+        tipo = TT_SUPERIOR
+    elif valor >= beta:
+        tipo = TT_INFERIOR
+    else:
+        tipo = TT_EXACTO
+    TT[clave] = (profundidad, valor_a_tt(valor, ply), tipo, mejor_movimiento)
+
+def puntuar_movimiento(movimiento, ply, movimiento_tt):
+    """
+    Da una puntuación de ordenación a un movimiento: cuanto más alta, antes se prueba.
+    :param movimiento: El movimiento a puntuar.
+    :param ply: Distancia a la raíz del nodo que se está buscando (índice en KILLERS).
+    :param movimiento_tt: Mejor movimiento guardado en la TT para esta posición, o None.
+    :return: PUNTOS_MOVIMIENTO_TT, PUNTOS_CAPTURA + MVV-LVA, PUNTOS_KILLER o 0.
+    """
+    if movimiento == movimiento_tt:
+        return PUNTOS_MOVIMIENTO_TT
+    if movimiento.es_captura:
+        return PUNTOS_CAPTURA + PIECE_SCORES[movimiento.pieza_capturada[1]] * 10 - VALOR_ATACANTE[movimiento.pieza_movida[1]]
+    if movimiento in KILLERS[ply]:
+        return PUNTOS_KILLER
+    return 0
+
+def guardar_killer(movimiento, ply):
+    """
+    Guarda un movimiento tranquilo que provocó un corte beta como killer del ply (mantiene los dos últimos).
+    """
+    if movimiento.es_captura:
+        return # Las capturas ya se ordenan por MVV-LVA
+    killers = KILLERS[ply]
+    if killers[0] != movimiento:
+        killers[1] = killers[0]
+        killers[0] = movimiento
+
+# --- Búsqueda de Quiescencia ---
+# Evaluar a profundidad 0 en mitad de un intercambio da puntuaciones engañosas (efecto horizonte):
+# la IA ve que gana una pieza pero no la recaptura que viene justo después. La quiescencia sigue
+# buscando solo capturas hasta llegar a una posición "tranquila" antes de evaluar.
+
+def busqueda_quiescencia(estado_juego, movimientos_legales, ply, alpha, beta, multiplicador_turno):
+    """
+    Búsqueda con poda Alpha-Beta que solo considera capturas, usada en las hojas de negamax.
+    En jaque no hay "stand pat" y se buscan todas las respuestas, no solo las capturas.
+    :param estado_juego: El estado actual del juego.
+    :param movimientos_legales: Lista de movimientos legales para el estado actual, o None para generarlos.
+    :param ply: Distancia a la raíz (para puntuar los mates).
+    :param alpha: Igual que en encontrar_movimiento_negamax_ab.
+    :param beta: Igual que en encontrar_movimiento_negamax_ab.
+    :param multiplicador_turno: 1 si les toca a las blancas, -1 si les toca a las negras.
+    :return: Puntuación de la posición desde el punto de vista del jugador al que le toca.
+    """
+    # Generar los movimientos también marca jaque_mate/ahogado/jaque.
+    if movimientos_legales is None:
+        movimientos_legales = obtener_movimientos(estado_juego)
+    if estado_juego.jaque_mate:
+        return ply - PUNTUACION_MATE
+    if estado_juego.ahogado:
+        return 0
+
+    if estado_juego.jaque:
+        # En jaque no se puede "no hacer nada": la evaluación estática no es una cota; se buscan todas las evasiones.
+        max_puntuacion = -INFINITO
+        candidatos = list(movimientos_legales)
+    else:
+        # "Stand pat": el jugador no está obligado a capturar, así que la evaluación actual es una cota inferior.
+        max_puntuacion = multiplicador_turno * evaluar_tablero(estado_juego)
+        if max_puntuacion >= beta:
+            return max_puntuacion
+        if max_puntuacion > alpha:
+            alpha = max_puntuacion
+        candidatos = [m for m in movimientos_legales if m.es_captura]
+    candidatos.sort(key=lambda m: -puntuar_movimiento(m, 0, None))
+    hacer_movimiento = estado_juego.hacer_movimiento # Métodos en variables locales para el bucle
+    deshacer_movimiento = estado_juego.deshacer_movimiento
+    for movimiento in candidatos:
+        hacer_movimiento(movimiento, False)
+        puntuacion = -busqueda_quiescencia(estado_juego, None, ply + 1, -beta, -alpha, -multiplicador_turno)
+        deshacer_movimiento()
+
+        # Comparaciones explícitas en lugar de max(): alpha solo puede subir cuando sube la mejor puntuación,
+        # y solo entonces puede haber corte.
+        if puntuacion > max_puntuacion:
+            max_puntuacion = puntuacion
+            if puntuacion > alpha:
+                alpha = puntuacion
+                if alpha >= beta:
+                    break
+    return max_puntuacion
+
+# --- Implementación de Negamax con Poda Alpha-Beta (Optimización) ---
 # La poda Alpha-Beta es una mejora de Minimax que elimina ramas de búsqueda
 # que no afectarán la decisión final, haciendo que el algoritmo sea mucho más eficiente.
+# Negamax es la misma búsqueda escrita una sola vez: como max(a, b) = -min(-a, -b), cada nodo
+# maximiza su propia puntuación (la del jugador al que le toca) y niega la de sus hijos.
 
-def encontrar_movimiento_minimax_ab(estado_juego, movimientos_legales, profundidad, alpha, beta, turno_maximizador):
+def encontrar_movimiento_negamax_ab(estado_juego, movimientos_legales, profundidad, ply, alpha, beta, multiplicador_turno):
     """
-    Implementación del algoritmo Minimax con poda Alpha-Beta.
+    Implementación del algoritmo Negamax con poda Alpha-Beta para los nodos internos (la raíz la lleva buscar_raiz).
     :param estado_juego: El estado actual del juego.
-    :param movimientos_legales: Lista de movimientos legales para el estado actual.
+    :param movimientos_legales: Lista de movimientos legales para el estado actual, o None para que el nodo
+                                los genere él mismo (solo si la tabla de transposición no lo resuelve antes).
     :param profundidad: La profundidad de búsqueda restante del algoritmo.
-    :param alpha: El mejor valor que el jugador maximizador ha encontrado hasta ahora en la ruta.
-    :param beta: El mejor valor que el jugador minimizador ha encontrado hasta ahora en la ruta.
-    :param turno_maximizador: True si es el turno del jugador que maximiza (IA), False si es el turno del jugador que minimiza (oponente).
-    :return: Puntuación óptima de la posición.
-    """
-    global PROXIMO_MOVIMIENTO_IA # Acceder a la variable global para guardar el mejor movimiento
-
-    # Caso base de la recursión: si se alcanza la profundidad cero, o un estado final (jaque mate/ahogado)
-    if profundidad == 0 or estado_juego.jaque_mate or estado_juego.ahogado:
-        return evaluar_tablero(estado_juego)
-
-    # Ordenar los movimientos aleatoriamente para introducir variedad en movimientos de igual valor
-    # (También se pueden ordenar heurísticamente para mejorar la poda Alpha-Beta)
-    # random.shuffle(movimientos_legales) 
-
-    if turno_maximizador: # Jugador que maximiza (la IA si es su turno)
-        max_puntuacion = -float('inf')
-        for movimiento in movimientos_legales:
-            estado_juego.hacer_movimiento(movimiento) # Simula el movimiento
-            # Llamada recursiva para el siguiente turno (minimizador)
-            puntuacion = encontrar_movimiento_minimax_ab(estado_juego, estado_juego.obtener_movimientos_legales(), profundidad - 1, alpha, beta, False)
-            
+    :param ply: Distancia a la raíz (para los killers).
+    :param alpha: El mejor valor que el jugador al que le toca tiene asegurado hasta ahora en la ruta.
+    :param beta: El mejor valor que el oponente tiene asegurado (visto desde el jugador al que le toca).
+    :param multiplicador_turno: 1 si les toca a las blancas, -1 si les toca a las negras.
+    :return: Puntuación óptima de la posición desde el punto de vista del jugador al que le toca.
+    """
+    # Consultar la tabla de transposición antes de generar movimientos: si la posición ya se buscó
+    # con profundidad suficiente, no hace falta ni siquiera obtener sus movimientos legales.
+    # Los valores de la TT están, como los de negamax, desde el punto de vista del jugador al que le toca.
+    clave = estado_juego.zobrist
+    entrada = TT.get(clave)
+    if entrada is not None and entrada[0] >= profundidad:
+        valor, tipo = valor_desde_tt(entrada[1], ply), entrada[2]
+        if tipo == TT_EXACTO:
+            return valor
+        elif tipo == TT_INFERIOR:
+            if valor > alpha:
+                alpha = valor
+        elif valor < beta: # TT_SUPERIOR
+            beta = valor
+        if alpha >= beta:
+            return valor
+
+    # Ventana con la que realmente se busca este nodo, para clasificar el resultado al guardarlo.
+    alpha_inicial = alpha
+    mejor_movimiento = None
+    max_puntuacion = -INFINITO
+    hacer_movimiento = estado_juego.hacer_movimiento # Métodos en variables locales para los bucles
+    deshacer_movimiento = estado_juego.deshacer_movimiento
+
+    # Si la TT tiene el mejor movimiento de una búsqueda anterior de esta posición, se prueba antes de
+    # generar los demás: con buena ordenación suele provocar el corte beta, y entonces no hace falta
+    # generar la lista. (Si la TT trae movimiento, la posición no es final, y una entrada de profundidad 0
+    # nunca lo trae; aun así se exige profundidad > 0 por si la entrada viene de una búsqueda más profunda.)
+    movimiento_tt = entrada[3] if entrada is not None else None
+    ya_buscado = None # Movimiento de la TT si ya se buscó aquí
+    if movimiento_tt is not None and movimientos_legales is None and profundidad > 0:
+        hacer_movimiento(movimiento_tt, False)
+        max_puntuacion = -encontrar_movimiento_negamax_ab(estado_juego, None, profundidad - 1, ply + 1, -beta, -alpha, -multiplicador_turno)
+        deshacer_movimiento()
+        mejor_movimiento = ya_buscado = movimiento_tt
+        if max_puntuacion > alpha:
+            alpha = max_puntuacion
+            if alpha >= beta:
+                guardar_killer(movimiento_tt, ply)
+                guardar_en_tt(clave, profundidad, ply, max_puntuacion, alpha_inicial, beta, mejor_movimiento)
+                return max_puntuacion
+
+    # Generar los movimientos aquí también marca jaque_mate/ahogado, que necesita el caso base.
+    if movimientos_legales is None:
+        movimientos_legales = obtener_movimientos(estado_juego)
+
+    # Caso base de la recursión: un estado final (jaque mate/ahogado) se evalúa directamente.
+    # El jugador al que le toca es el mateado; cuanto más lejos de la raíz, menos pierde.
+    if estado_juego.jaque_mate or estado_juego.ahogado:
+        valor = ply - PUNTUACION_MATE if estado_juego.jaque_mate else 0
+        TT[clave] = (profundidad, valor_a_tt(valor, ply), TT_EXACTO, None) # La evaluación de un final es exacta
+        return valor
+    # Al llegar a profundidad cero, se resuelven las capturas pendientes antes de evaluar.
+    # Su valor depende de la ventana (alpha, beta), así que se guarda como cota si hace falta.
+    if profundidad == 0:
+        valor = busqueda_quiescencia(estado_juego, movimientos_legales, ply, alpha, beta, multiplicador_turno)
+        guardar_en_tt(clave, profundidad, ply, valor, alpha, beta, None)
+        return valor
+
+    # Ordenar los movimientos para mejorar la poda Alpha-Beta: primero el mejor movimiento de una búsqueda
+    # anterior de esta posición (aunque fuera menos profunda), luego capturas por MVV-LVA, luego killers.
+    movimientos_legales.sort(key=lambda m: -puntuar_movimiento(m, ply, movimiento_tt))
+
+    for movimiento in movimientos_legales:
+        if movimiento == ya_buscado:
+            continue # El movimiento de la TT ya se buscó antes de generar la lista
+        hacer_movimiento(movimiento, False) # Simula el movimiento (ver obtener_movimientos)
+        # Llamada recursiva para el oponente: su mejor puntuación es la peor para nosotros
+        puntuacion = -encontrar_movimiento_negamax_ab(estado_juego, None, profundidad - 1, ply + 1, -beta, -alpha, -multiplicador_turno)
+        deshacer_movimiento() # Deshace el movimiento simulado para volver al estado original
+
+        if puntuacion > max_puntuacion:
+            max_puntuacion = puntuacion
+            mejor_movimiento = movimiento
+            # Poda Alpha-Beta (alpha solo puede subir, y solo puede haber corte, cuando sube la mejor puntuación)
+            if puntuacion > alpha:
+                alpha = puntuacion
+                if alpha >= beta: # Si el oponente ya tiene una opción mejor, no necesitamos seguir explorando esta rama
+                    guardar_killer(movimiento, ply)
+                    break
+    guardar_en_tt(clave, profundidad, ply, max_puntuacion, alpha_inicial, beta, mejor_movimiento)
+    return max_puntuacion
+
+def preparar_tablas(id_partida):
+    """
+    Prepara las tablas del proceso para una búsqueda nueva: las vacía si son de otra partida o si la TT ha
+    crecido demasiado (se conservan entre jugadas de la misma partida, porque muchas posiciones se repiten),
+    y empieza los killers de cero. La caché de movimientos se vacía sola al llenarse (ver obtener_movimientos).
+    :param id_partida: ID_PARTIDA del proceso principal para esta búsqueda.
+    """
+    global PARTIDA_TABLAS
+    if PARTIDA_TABLAS != id_partida:
+        TT.clear()
+        CACHE_MOVIMIENTOS.clear()
+        PARTIDA_TABLAS = id_partida
+    if len(TT) > TT_MAX_ENTRADAS:
+        TT.clear()
+    # Los killers son de la posición anterior; se empiezan de cero (y con tantos plies como la profundidad actual).
+    KILLERS[:] = [[None, None] for _ in range(PROFUNDIDAD_BUSQUEDA + 1)]
+
+def iniciar_proceso(busqueda_en_curso):
+    """
+    Inicializador de cada proceso del EJECUTOR_PROCESOS: recibe el BUSQUEDA_EN_CURSO compartido.
+    """
+    global BUSQUEDA_EN_CURSO
+    BUSQUEDA_EN_CURSO = busqueda_en_curso
+
+def buscar_movimientos_en_proceso(estado_juego, movimientos, profundidad, alpha, beta, multiplicador_turno,
+                                  id_busqueda, id_partida):
+    """
+    Busca un lote de movimientos de la raíz en un proceso del EJECUTOR_PROCESOS, uno detrás de otro,
+    subiendo su propio alpha con cada uno (como la búsqueda secuencial) y parando si alguno llega a beta.
+    Cada proceso tiene su propia TT y caché de movimientos, que se conservan entre llamadas y se preparan
+    (ver preparar_tablas) con el primer encargo de cada búsqueda, igual que las del proceso principal.
+    :param estado_juego: Copia (serializada una sola vez por lote) del estado de la raíz.
+    :param movimientos: Lista de movimientos de la raíz a buscar, en el orden de la raíz.
+    :param profundidad: Profundidad de la raíz.
+    :param alpha: Alpha de la raíz después de buscar su primer movimiento.
+    :param beta: Beta de la raíz.
+    :param multiplicador_turno: El de la raíz.
+    :param id_busqueda: ID_BUSQUEDA de la búsqueda que hace el encargo.
+    :param id_partida: ID_PARTIDA de esa búsqueda.
+    :return: Lista con la puntuación de cada movimiento para el jugador de la raíz (exacta si supera el alpha del
+             lote en ese momento, si no una cota), que se corta tras el primero que llegue a beta;
+             o None si la búsqueda ya se canceló (nadie espera el resultado).
+    """
+    global BUSQUEDA_PROCESO
+    if BUSQUEDA_EN_CURSO.value != id_busqueda:
+        return None # Encargo atrasado de una búsqueda cancelada
+    if BUSQUEDA_PROCESO != id_busqueda:
+        preparar_tablas(id_partida)
+        BUSQUEDA_PROCESO = id_busqueda
+    puntuaciones = []
+    for movimiento in movimientos:
+        if BUSQUEDA_EN_CURSO.value != id_busqueda:
+            return None # Cancelada a mitad del lote
+        estado_juego.hacer_movimiento(movimiento, False)
+        puntuacion = -encontrar_movimiento_negamax_ab(estado_juego, None, profundidad - 1, 1, -beta, -alpha, -multiplicador_turno)
+        estado_juego.deshacer_movimiento()
+        puntuaciones.append(puntuacion)
+        if puntuacion > alpha:
+            alpha = puntuacion
+            if alpha >= beta:
+                break
+    return puntuaciones
+
+def nueva_partida():
+    """
+    Avisa de que empieza una partida nueva: la siguiente búsqueda empieza con las tablas vacías.
+    """
+    global ID_PARTIDA
+    ID_PARTIDA += 1
+
+def cerrar_procesos():
+    """
+    Cierra el EJECUTOR_PROCESOS, si se llegó a crear. La interfaz lo llama al salir.
+    """
+    global EJECUTOR_PROCESOS, BUSQUEDA_EN_CURSO
+    if EJECUTOR_PROCESOS is not None:
+        BUSQUEDA_EN_CURSO.value = 0 # Lo que quede en la cola ya no vale
+        EJECUTOR_PROCESOS.shutdown(wait=False, cancel_futures=True)
+        EJECUTOR_PROCESOS = None
+        BUSQUEDA_EN_CURSO = None
+
+def buscar_raiz(estado_juego, movimientos_legales, profundidad, multiplicador_turno, cancel_event=None,
+                alpha=-INFINITO, beta=INFINITO):
+    """
+    Busca la raíz del árbol: recorre los movimientos legales y devuelve el mejor.
+    Separada de encontrar_movimiento_negamax_ab para que los nodos internos no tengan que comprobar
+    si son la raíz, ni guardar el movimiento elegido, ni mirar la cancelación.
+    :param estado_juego: El estado actual del juego.
+    :param movimientos_legales: Lista de movimientos legales de la raíz (no puede estar vacía).
+    :param profundidad: Profundidad de esta búsqueda.
+    :param multiplicador_turno: 1 si les toca a las blancas, -1 si les toca a las negras.
+    :param cancel_event: threading.Event opcional; si se activa, se levanta BusquedaCancelada entre movimientos,
+                         donde no hay nada que deshacer.
+    :param alpha: Límite inferior de la ventana (ver VENTANA_ASPIRACION).
+    :param beta: Límite superior de la ventana.
+    :return: Tupla (mejor_movimiento, puntuacion), con la puntuación desde el punto de vista del jugador al que le toca.
+             Si la puntuación es <= alpha o >= beta, es solo una cota y hay que repetir la búsqueda con otra ventana.
+    """
+    global EJECUTOR_PROCESOS, BUSQUEDA_EN_CURSO
+    clave = estado_juego.zobrist
+    entrada = TT.get(clave)
+    movimiento_tt = entrada[3] if entrada is not None else None
+    movimientos_legales.sort(key=lambda m: -puntuar_movimiento(m, 0, movimiento_tt))
+
+    paralelo = profundidad >= PROFUNDIDAD_PARALELA and PROCESOS_RAIZ > 1 and len(movimientos_legales) > 1
+
+    alpha_inicial = alpha
+    mejor_movimiento = None
+    max_puntuacion = -INFINITO
+    for movimiento in movimientos_legales:
+        if cancel_event is not None and cancel_event.is_set():
+            raise BusquedaCancelada()
+        estado_juego.hacer_movimiento(movimiento, False)
+        puntuacion = -encontrar_movimiento_negamax_ab(estado_juego, None, profundidad - 1, 1, -beta, -alpha, -multiplicador_turno)
+        estado_juego.deshacer_movimiento()
+
+        if puntuacion > max_puntuacion:
+            max_puntuacion = puntuacion
+            mejor_movimiento = movimiento
+            if puntuacion > alpha:
+                alpha = puntuacion
+                if alpha >= beta:
+                    paralelo = False # Falla por arriba: no hace falta buscar el resto
+                    break
+        if paralelo:
+            break # El resto de movimientos se reparte entre los procesos
+
+    if paralelo:
+        if cancel_event is not None and cancel_event.is_set():
+            raise BusquedaCancelada()
+        if EJECUTOR_PROCESOS is None:
+            # "spawn" en todos los sistemas: no se duplica con fork un proceso que ya tiene hilos (pygame, la IA).
+            contexto = multiprocessing.get_context("spawn")
+            BUSQUEDA_EN_CURSO = contexto.Value('q', ID_BUSQUEDA)
+            EJECUTOR_PROCESOS = ProcessPoolExecutor(max_workers=PROCESOS_RAIZ, mp_context=contexto,
+                                                    initializer=iniciar_proceso, initargs=(BUSQUEDA_EN_CURSO,))
+        # Referencias locales: si cerrar_procesos pone a None los globales mientras se espera, esta búsqueda
+        # sigue usando los suyos hasta terminar.
+        ejecutor, busqueda_en_curso = EJECUTOR_PROCESOS, BUSQUEDA_EN_CURSO
+        # Un lote por proceso, repartido a saltos para que los movimientos mejor ordenados no caigan todos
+        # en el mismo: el estado se serializa una vez por lote y no una por movimiento.
+        resto = movimientos_legales[1:]
+        lotes = [resto[i::PROCESOS_RAIZ] for i in range(min(PROCESOS_RAIZ, len(resto)))]
+        futuros = [ejecutor.submit(buscar_movimientos_en_proceso, estado_juego, lote,
+                                   profundidad, alpha, beta, multiplicador_turno, ID_BUSQUEDA, ID_PARTIDA)
+                   for lote in lotes]
+        # Esperar a los procesos sin dejar de atender la cancelación.
+        pendientes = set(futuros)
+        while pendientes:
+            if cancel_event is not None and cancel_event.is_set():
+                # Los lotes que ya se están buscando paran en su siguiente movimiento; los que no han empezado
+                # se cancelan, o se los saltan los procesos si ya estaban en su cola.
+                busqueda_en_curso.value = 0
+                for futuro in pendientes:
+                    futuro.cancel()
+                raise BusquedaCancelada()
+            _, pendientes = wait(pendientes, timeout=0.05, return_when=FIRST_COMPLETED)
+        # Recorrerlos en el orden de la lista para desempatar igual que la búsqueda secuencial. Un lote solo se
+        # corta tras un movimiento que llega a beta, y este bucle para en él (o antes) sin llegar a los que faltan.
+        puntuaciones = [None] * len(resto)
+        for i, futuro in enumerate(futuros):
+            resultado = futuro.result()
+            puntuaciones[i:i + PROCESOS_RAIZ * len(resultado):PROCESOS_RAIZ] = resultado
+        for movimiento, puntuacion in zip(resto, puntuaciones):
             if puntuacion > max_puntuacion:
                 max_puntuacion = puntuacion
-                if profundidad == PROFUNDIDAD_BUSQUEDA: # Solo guarda el movimiento en la llamada inicial (profundidad original)
-                    PROXIMO_MOVIMIENTO_IA = movimiento
-            
-            estado_juego.deshacer_movimiento() # Deshace el movimiento simulado para volver al estado original
-
-            # Poda Alpha-Beta
-            alpha = max(alpha, max_puntuacion)
-            if beta <= alpha: # Si el minimizador ya tiene una opción mejor, no necesitamos seguir explorando esta rama
-                break
-        return max_puntuacion
-    else: # Jugador que minimiza (el oponente de la IA)
-        min_puntuacion = float('inf')
-        for movimiento in movimientos_legales:
-            estado_juego.hacer_movimiento(movimiento) # Simula el movimiento
-            # Llamada recursiva para el siguiente turno (maximizador)
-            puntuacion = encontrar_movimiento_minimax_ab(estado_juego, estado_juego.obtener_movimientos_legales(), profundidad - 1, alpha, beta, True)
-            
-            if puntuacion < min_puntuacion:
-                min_puntuacion = puntuacion
-                if profundidad == PROFUNDIDAD_BUSQUEDA: # Solo guarda el movimiento en la llamada inicial
-                    PROXIMO_MOVIMIENTO_IA = movimiento # Esto es para asegurar que si la IA es minimizadora, también guarde su movimiento
-            
-            estado_juego.deshacer_movimiento() # Deshace el movimiento simulado
-
-            # Poda Alpha-Beta
-            beta = min(beta, min_puntuacion)
-            if beta <= alpha: # Si el maximizador ya tiene una opción mejor, no necesitamos seguir explorando esta rama
-                break
-        return min_puntuacion
+                mejor_movimiento = movimiento
+                if puntuacion >= beta:
+                    break
+
+    guardar_en_tt(clave, profundidad, 0, max_puntuacion, alpha_inicial, beta, mejor_movimiento)
+    return mejor_movimiento, max_puntuacion
+
+def buscar_con_aspiracion(estado_juego, movimientos_legales, profundidad, multiplicador_turno, puntuacion_previa, cancel_event=None):
+    """
+    Busca la raíz con una ventana de aspiración alrededor de puntuacion_previa (ver VENTANA_ASPIRACION),
+    repitiendo la búsqueda con una ventana más ancha mientras el resultado caiga fuera.
+    :param puntuacion_previa: Puntuación de la iteración anterior, o None para buscar con la ventana completa.
+    :return: Tupla (mejor_movimiento, puntuacion), como buscar_raiz, con la puntuación exacta.
+    """
+    # Sin puntuación previa, o si es un mate (lejos de cualquier margen razonable), ventana completa.
+    if puntuacion_previa is None or puntuacion_previa > LIMITE_MATE or puntuacion_previa < -LIMITE_MATE:
+        return buscar_raiz(estado_juego, movimientos_legales, profundidad, multiplicador_turno, cancel_event)
+    margen_inferior = margen_superior = VENTANA_ASPIRACION
+    while True:
+        alpha = puntuacion_previa - margen_inferior if margen_inferior <= VENTANA_MAXIMA else -INFINITO
+        beta = puntuacion_previa + margen_superior if margen_superior <= VENTANA_MAXIMA else INFINITO
+        mejor_movimiento, puntuacion = buscar_raiz(estado_juego, movimientos_legales, profundidad,
+                                                   multiplicador_turno, cancel_event, alpha, beta)
+        if puntuacion <= alpha:
+            margen_inferior *= 2 # Falla por abajo
+        elif puntuacion >= beta:
+            margen_superior *= 2 # Falla por arriba
+        else:
+            return mejor_movimiento, puntuacion
 
 # --- Función principal para encontrar el mejor movimiento de la IA ---
-def find_best_move(gs):
+def find_best_move(gs, cancel_event=None, progress_cb=None):
     """
     Función principal para que la IA elija su mejor movimiento.
-    Utiliza el algoritmo Minimax con poda Alpha-Beta.
+    Utiliza el algoritmo Negamax con poda Alpha-Beta y profundización iterativa:
+    busca a profundidad 1, 2, ... hasta PROFUNDIDAD_BUSQUEDA, de modo que siempre
+    hay un movimiento completo de la última profundidad terminada.
+    :param gs: El estado actual del juego.
+    :param cancel_event: threading.Event opcional. Si se activa, la búsqueda se detiene
+                         y se devuelve el movimiento de la última profundidad completa (o None).
+    :param progress_cb: Función opcional progress_cb(profundidad, movimiento), llamada al terminar cada profundidad.
+    :return: El movimiento elegido, o None si no hay movimientos legales o se canceló antes de terminar la primera profundidad.
     """
-    global PROXIMO_MOVIMIENTO_IA # Asegura que estamos modificando la variable global
-    PROXIMO_MOVIMIENTO_IA = None # Reiniciar para cada nueva búsqueda
+    global ID_BUSQUEDA
+    ID_BUSQUEDA += 1
+    if BUSQUEDA_EN_CURSO is not None:
+        BUSQUEDA_EN_CURSO.value = ID_BUSQUEDA
+    preparar_tablas(ID_PARTIDA)
 
     # Obtener los movimientos legales para el turno actual
     movimientos_legales = gs.obtener_movimientos_legales()
@@ -138,15 +580,27 @@ def find_best_move(gs):
     if not movimientos_legales:
         return None # No hay movimientos legales, esto indica jaque mate o ahogado
 
-    # Llamar a Minimax. `turno_maximizador` depende de si la IA es el jugador blanco o negro.
+    # Llamar a Negamax. `multiplicador_turno` depende de si la IA es el jugador blanco o negro.
     # Asumimos que la IA es el jugador cuyo turno es `gs.turno_blancas`.
-    # Si es el turno de las blancas, queremos maximizar la puntuación.
-    # Si es el turno de las negras, queremos minimizar la puntuación (que es equivalente a maximizar la puntuación negativa).
-    # La función `encontrar_movimiento_minimax_ab` ya maneja esto.
-
-    # Es importante pasar los movimientos_legales calculados antes,
-    # ya que la primera llamada a la función no los recalcula.
-    # Las llamadas recursivas sí los recalcularán para cada nuevo estado.
-    encontrar_movimiento_minimax_ab(gs, movimientos_legales, PROFUNDIDAD_BUSQUEDA, -float('inf'), float('inf'), gs.turno_blancas)
-    
-    return PROXIMO_MOVIMIENTO_IA
\ No newline at end of file
+    # Si es el turno de las blancas, se maximiza la puntuación tal cual; si es el de las negras,
+    # se maximiza la puntuación negada (equivalente a minimizarla).
+    multiplicador_turno = 1 if gs.turno_blancas else -1
+
+    # Se pasan los movimientos_legales calculados antes para que la raíz no los recalcule.
+    # Las llamadas recursivas los generan ellas mismas si la tabla de transposición no los resuelve.
+    mejor_movimiento = None
+    puntuacion = None # La primera iteración se busca con la ventana completa
+    for profundidad in range(1, PROFUNDIDAD_BUSQUEDA + 1):
+        try:
+            mejor_movimiento, puntuacion = buscar_con_aspiracion(gs, movimientos_legales, profundidad,
+                                                                 multiplicador_turno, puntuacion, cancel_event)
+        except BusquedaCancelada:
+            break # La iteración incompleta no cuenta; se queda el movimiento de la anterior
+        # La siguiente iteración empieza por el mejor movimiento de esta (la variante principal).
+        # La TT ya lo suele poner primero, pero así no depende de que la entrada de la raíz siga ahí.
+        movimientos_legales.remove(mejor_movimiento)
+        movimientos_legales.insert(0, mejor_movimiento)
+        if progress_cb is not None:
+            progress_cb(profundidad, mejor_movimiento)
+
+    return mejor_movimiento
@@ -1,50 +1,257 @@
 # chess_engine.py
 
+import itertools
+import random
+# Valores de las piezas para la evaluación material.
+# Estos son valores heurísticos comunes, en centésimas de peón para poder sumarles las tablas de posición.
+PIECE_SCORES = {
+    'p': 100,   # Peón
+    'n': 300,   # Caballo
+    'b': 300,   # Alfil
+    'r': 500,   # Torre
+    'q': 900,   # Reina
+    'k': 0      # Rey (su valor es 0 porque es el objetivo, no una pieza a ganar)
+}
+
+# --- Tablas de posición (piece-square tables) ---
+# Bonificación por tener cada tipo de pieza en cada casilla, vista desde las blancas
+# (la primera fila es la fila 8 del tablero, igual que self.tablero[0]).
+# Valores de la "Simplified Evaluation Function" de Tomasz Michniewski.
+TABLAS_POSICION = {
+    'p': [  0,   0,   0,   0,   0,   0,   0,   0,
+           50,  50,  50,  50,  50,  50,  50,  50,
+           10,  10,  20,  30,  30,  20,  10,  10,
+            5,   5,  10,  25,  25,  10,   5,   5,
+            0,   0,   0,  20,  20,   0,   0,   0,
+            5,  -5, -10,   0,   0, -10,  -5,   5,
+            5,  10,  10, -20, -20,  10,  10,   5,
+            0,   0,   0,   0,   0,   0,   0,   0],
+    'n': [-50, -40, -30, -30, -30, -30, -40, -50,
+          -40, -20,   0,   0,   0,   0, -20, -40,
+          -30,   0,  10,  15,  15,  10,   0, -30,
+          -30,   5,  15,  20,  20,  15,   5, -30,
+          -30,   0,  15,  20,  20,  15,   0, -30,
+          -30,   5,  10,  15,  15,  10,   5, -30,
+          -40, -20,   0,   5,   5,   0, -20, -40,
+          -50, -40, -30, -30, -30, -30, -40, -50],
+    'b': [-20, -10, -10, -10, -10, -10, -10, -20,
+          -10,   0,   0,   0,   0,   0,   0, -10,
+          -10,   0,   5,  10,  10,   5,   0, -10,
+          -10,   5,   5,  10,  10,   5,   5, -10,
+          -10,   0,  10,  10,  10,  10,   0, -10,
+          -10,  10,  10,  10,  10,  10,  10, -10,
+          -10,   5,   0,   0,   0,   0,   5, -10,
+          -20, -10, -10, -10, -10, -10, -10, -20],
+    'r': [  0,   0,   0,   0,   0,   0,   0,   0,
+            5,  10,  10,  10,  10,  10,  10,   5,
+           -5,   0,   0,   0,   0,   0,   0,  -5,
+           -5,   0,   0,   0,   0,   0,   0,  -5,
+           -5,   0,   0,   0,   0,   0,   0,  -5,
+           -5,   0,   0,   0,   0,   0,   0,  -5,
+           -5,   0,   0,   0,   0,   0,   0,  -5,
+            0,   0,   0,   5,   5,   0,   0,   0],
+    'q': [-20, -10, -10,  -5,  -5, -10, -10, -20,
+          -10,   0,   0,   0,   0,   0,   0, -10,
+          -10,   0,   5,   5,   5,   5,   0, -10,
+           -5,   0,   5,   5,   5,   5,   0,  -5,
+            0,   0,   5,   5,   5,   5,   0,  -5,
+          -10,   5,   5,   5,   5,   5,   0, -10,
+          -10,   0,   5,   0,   0,   0,   0, -10,
+          -20, -10, -10,  -5,  -5, -10, -10, -20],
+    'k': [-30, -40, -40, -50, -50, -40, -40, -30, # Medio juego: el rey, enrocado y detrás de sus peones
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -20, -30, -30, -40, -40, -30, -30, -20,
+          -10, -20, -20, -20, -20, -20, -20, -10,
+           20,  20,   0,   0,   0,   0,  20,  20,
+           20,  30,  10,   0,   0,  10,  30,  20],
+}
+# Valor total con signo (positivo = ventaja de las blancas) de cada pieza en cada casilla, material + posición:
+# VALOR_CASILLA[pieza][fila * 8 + col], indexado por el código completo ("wp", "bq", ...) para no trocearlo.
+# Para las negras la tabla se refleja verticalmente (casilla ^ 56 cambia la fila f por 7 - f).
+VALOR_CASILLA = {}
+for _tipo, _tabla in TABLAS_POSICION.items():
+    VALOR_CASILLA['w' + _tipo] = [PIECE_SCORES[_tipo] + _tabla[casilla] for casilla in range(64)]
+    VALOR_CASILLA['b' + _tipo] = [-(PIECE_SCORES[_tipo] + _tabla[casilla ^ 56]) for casilla in range(64)]
+VALOR_CASILLA["--"] = [0] * 64 # Casilla vacía: así los recorridos del tablero no necesitan comparar con "--"
+
+# --- Claves Zobrist ---
+# Cada posición se resume en un entero de 64 bits: el XOR de una clave aleatoria por (pieza, casilla),
+# más claves para el turno, los derechos de enroque y la casilla de en passant.
+# Se usa una semilla fija para que el hash de una posición sea el mismo en cada ejecución.
+_generador_zobrist = random.Random(20240607)
+ZOBRIST_PIEZAS = {color + tipo: [_generador_zobrist.getrandbits(64) for _ in range(64)]
+                  for color in "wb" for tipo in "pnbrqk"} # Índice de casilla: fila * 8 + col
+ZOBRIST_PIEZAS["--"] = [0] * 64 # Casilla vacía: XOR con 0 no cambia el hash
+ZOBRIST_TURNO_NEGRAS = _generador_zobrist.getrandbits(64) # Se aplica cuando mueven las negras
+ZOBRIST_ENROQUE = [_generador_zobrist.getrandbits(64) for _ in range(16)] # Índice: EstadoJuego.derechos_enroque_actuales
+ZOBRIST_EN_PASSANT = [_generador_zobrist.getrandbits(64) for _ in range(64)] # Por casilla de en passant
+ZOBRIST_EN_PASSANT.append(0) # Índice -1 (sin en passant, ver EstadoJuego.casilla_en_passant): XOR con 0 no cambia el hash
+
+# --- Bitboards ---
+# Un bitboard es un int con un bit por casilla: el bit fila * 8 + col (el bit 0 es self.tablero[0][0], a8).
+# Las tablas de ataques dan, para cada casilla, el bitboard de las casillas que ataca una pieza desde ella.
+# Para recorrer las casillas de un bitboard hay dos formas:
+#     casilla = b.bit_length() - 1; b ^= 1 << casilla          (de la más alta a la más baja)
+#     bit = b & -b; b ^= bit; casilla = bit.bit_length() - 1    (de la más baja a la más alta)
+# La primera es una sola llamada en C y cuesta un 35-40 % menos por casilla, así que es la que se usa donde el
+# orden da igual (ataques, clavadas, jaques). Los bucles que añaden movimientos a la lista van de la más baja a la
+# más alta: es el orden de recorrer self.tablero fila a fila, y la IA desempata por él (ordena con sort, que es estable).
+def _tabla_saltos(saltos):
+    tabla = []
+    for casilla in range(64):
+        fila, col = divmod(casilla, 8)
+        ataques = 0
+        for dr, dc in saltos:
+            if 0 <= fila + dr < 8 and 0 <= col + dc < 8:
+                ataques |= 1 << ((fila + dr) * 8 + col + dc)
+        tabla.append(ataques)
+    return tuple(tabla) # Tabla fija: tupla indexada por casilla, como NOMBRES_CASILLAS
+
+ATAQUES_CABALLO = _tabla_saltos(((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)))
+ATAQUES_REY = _tabla_saltos(((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)))
+# Por color del peón: los blancos atacan hacia la fila 0 y los negros hacia la fila 7.
+ATAQUES_PEON = {'w': _tabla_saltos(((-1, -1), (-1, 1))), 'b': _tabla_saltos(((1, -1), (1, 1)))}
+
+# Columnas de los bordes, para desplazar todos los peones a la vez sin que pasen de un lado del tablero al otro.
+COLUMNA_A = 0x0101010101010101 # col 0
+COLUMNA_H = COLUMNA_A << 7 # col 7
+# Fila a la que llegan los peones con su primer avance desde la fila inicial: desde ahí pueden avanzar otra vez.
+FILA_DOBLE_AVANCE = {'w': 0xFF << 40, 'b': 0xFF << 16} # Fila 5 para las blancas, fila 2 para las negras
+
+# Los ataques de torres y alfiles dependen de las piezas que tengan en medio. MASCARA_TORRE[casilla] son las
+# casillas cuyo contenido importa (sus rayos sin la última casilla, que se ataca igual esté ocupada o no) y
+# ATAQUES_TORRE[casilla][ocupacion & MASCARA_TORRE[casilla]] da los ataques con esa ocupación; igual para alfiles.
+# Es la idea de los "magic bitboards", pero con la propia ocupación como clave del diccionario en lugar de un
+# multiplicador mágico que la convierta en índice: en Python no hay que buscar los multiplicadores ni recortar
+# el producto a 64 bits. Son 102400 entradas para torres y 5248 para alfiles, construidas al importar.
+def _tablas_deslizantes(direcciones):
+    mascaras = []
+    tablas = []
+    ataques_unicos = {} # Para que las entradas con los mismos ataques compartan el mismo int
+    for casilla in range(64):
+        fila, col = divmod(casilla, 8)
+        opciones_por_rayo = [] # Por dirección: (ocupación del rayo, ataques) para cada ocupación posible
+        for dr, dc in direcciones:
+            rayo = []
+            f, c = fila + dr, col + dc
+            while 0 <= f < 8 and 0 <= c < 8:
+                rayo.append(f * 8 + c)
+                f += dr
+                c += dc
+            relevantes = rayo[:-1]
+            opciones = []
+            for n in range(1 << len(relevantes)):
+                ocupacion = 0
+                for i, sq in enumerate(relevantes):
+                    if n >> i & 1:
+                        ocupacion |= 1 << sq
+                ataques = 0
+                for sq in rayo: # Hasta la primera pieza, incluida
+                    ataques |= 1 << sq
+                    if ocupacion >> sq & 1:
+                        break
+                opciones.append((ocupacion, ataques))
+            opciones_por_rayo.append(opciones)
+        tabla = {}
+        mascara = 0
+        for combinacion in itertools.product(*opciones_por_rayo): # Los rayos son independientes entre sí
+            ocupacion = ataques = 0
+            for ocupacion_rayo, ataques_rayo in combinacion:
+                ocupacion |= ocupacion_rayo
+                ataques |= ataques_rayo
+            tabla[ocupacion] = ataques_unicos.setdefault(ataques, ataques)
+            mascara |= ocupacion
+        mascaras.append(mascara)
+        tablas.append(tabla)
+    return mascaras, tablas
+
+MASCARA_TORRE, ATAQUES_TORRE = _tablas_deslizantes(((-1, 0), (1, 0), (0, -1), (0, 1)))
+MASCARA_ALFIL, ATAQUES_ALFIL = _tablas_deslizantes(((-1, -1), (-1, 1), (1, -1), (1, 1)))
+
+# Para dos casillas en la misma fila, columna o diagonal: ENTRE[a][b] son las casillas que hay entre ellas
+# (sin incluirlas) y LINEA[a][b] la línea entera que pasa por las dos, de borde a borde. Si no están
+# alineadas, las dos valen 0. Sirven para los pins (la pieza clavada solo puede moverse por su línea
+# con el rey) y para tapar un jaque (interponiéndose entre el rey y la pieza que lo da).
+def _tablas_lineas():
+    entre = [[0] * 64 for _ in range(64)]
+    linea = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        fila, col = divmod(a, 8)
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)):
+            linea_completa = 1 << a
+            for sentido in (1, -1): # La línea sigue por los dos lados de a
+                f, c = fila + dr * sentido, col + dc * sentido
+                while 0 <= f < 8 and 0 <= c < 8:
+                    linea_completa |= 1 << (f * 8 + c)
+                    f += dr * sentido
+                    c += dc * sentido
+            casillas_entre = 0
+            f, c = fila + dr, col + dc
+            while 0 <= f < 8 and 0 <= c < 8:
+                b = f * 8 + c
+                entre[a][b] = casillas_entre
+                linea[a][b] = linea_completa
+                casillas_entre |= 1 << b
+                f += dr
+                c += dc
+    return entre, linea
+
+ENTRE, LINEA = _tablas_lineas()
+
+# Nombre en notación de ajedrez de cada casilla, indexado por fila * 8 + col: la columna es la letra
+# (a-h, de izquierda a derecha) y la fila 0 del tablero es la 8.
+NOMBRES_CASILLAS = tuple(chr(ord('a') + col) + str(8 - fila) for fila in range(8) for col in range(8))
+
 # Clase para representar un movimiento en ajedrez.
 class Movimiento:
-    # Mapeo de columnas a notación de ajedrez (a-h)
-    ranks_a_filas = {"1": 7, "2": 6, "3": 5, "4": 4,
-                     "5": 3, "6": 2, "7": 1, "8": 0}
-    filas_a_ranks = {v: k for k, v in ranks_a_filas.items()} # Invertir el diccionario
-
-    files_a_cols = {"a": 0, "b": 1, "c": 2, "d": 3,
-                    "e": 4, "f": 5, "g": 6, "h": 7}
-    cols_a_files = {v: k for k, v in files_a_cols.items()} # Invertir el diccionario
+    # Se crean cientos de miles por búsqueda: con __slots__ no llevan un __dict__ cada uno
+    # (ocupan menos y sus atributos se leen sin buscar en un diccionario).
+    __slots__ = ('fila_inicial', 'col_inicial', 'fila_final', 'col_final', 'pieza_movida', 'pieza_capturada',
+                 'es_promocion_peon', 'es_en_passant_movimiento', 'es_movimiento_enroque', 'es_captura', 'move_ID')
 
     def __init__(self, start_sq, end_sq, tablero, en_passant_posible=False, enroque_movimiento=False):
-        # start_sq y end_sq son tuplas (fila, columna)
-        self.fila_inicial = start_sq[0]
-        self.col_inicial = start_sq[1]
-        self.fila_final = end_sq[0]
-        self.col_final = end_sq[1]
+        # start_sq y end_sq son tuplas (fila, columna). Se trabaja con variables locales y cada atributo
+        # se asigna una sola vez: es lo que más se repite al generar movimientos.
+        fila_inicial, col_inicial = start_sq
+        fila_final, col_final = end_sq
+        self.fila_inicial = fila_inicial
+        self.col_inicial = col_inicial
+        self.fila_final = fila_final
+        self.col_final = col_final
         # Obtenemos la pieza movida y la pieza capturada (si la hay)
-        self.pieza_movida = tablero[self.fila_inicial][self.col_inicial]
-        self.pieza_capturada = tablero[self.fila_final][self.col_final] # Podría ser "--" si no hay captura
+        self.pieza_movida = pieza_movida = tablero[fila_inicial][col_inicial]
 
         # Manejo de movimientos especiales
-        self.es_promocion_peon = (self.pieza_movida[1] == 'p' and
-                                  ((self.pieza_movida[0] == 'w' and self.fila_final == 0) or
-                                   (self.pieza_movida[0] == 'b' and self.fila_final == 7)))
+        # Un peón solo llega a la fila 0 (si es blanco) o a la 7 (si es negro), y ahí promociona.
+        self.es_promocion_peon = pieza_movida[1] == 'p' and (fila_final == 0 or fila_final == 7)
         self.es_en_passant_movimiento = en_passant_posible
-        if self.es_en_passant_movimiento:
+        if en_passant_posible:
             # Si es en passant, la pieza capturada es el peón que pasó por la casilla adyacente
             # Asumimos que la pieza capturada es un peón del color opuesto
-            self.pieza_capturada = "wp" if self.pieza_movida[0] == 'b' else "bp"
+            self.pieza_capturada = "wp" if pieza_movida[0] == 'b' else "bp"
+            self.es_captura = True
+        else:
+            self.pieza_capturada = pieza_capturada = tablero[fila_final][col_final] # Podría ser "--" si no hay captura
+            # True si el movimiento captura una pieza (incluido en passant). La búsqueda de quiescencia de la IA lo usa.
+            self.es_captura = pieza_capturada != "--"
 
         self.es_movimiento_enroque = enroque_movimiento
 
-        # Identificador único para el movimiento (útil para historial y evitar repeticiones)
-        self.move_ID = self.fila_inicial * 1000 + self.col_inicial * 100 + \
-                         self.fila_final * 10 + self.col_final
+        # Identificador único para el movimiento (útil para historial y evitar repeticiones):
+        # las dos casillas empaquetadas en 12 bits, casilla_inicial * 64 + casilla_final.
+        self.move_ID = (fila_inicial << 9) | (col_inicial << 6) | (fila_final << 3) | col_final
 
-    # Sobreescribimos el método __eq__ para poder comparar objetos Movimiento
+    # Sobreescribimos el método __eq__ para poder comparar objetos Movimiento.
+    # Nadie hereda de Movimiento, así que basta comparar la clase (más rápido que isinstance).
     def __eq__(self, other):
-        if isinstance(other, Movimiento):
+        if other.__class__ is Movimiento:
             return self.move_ID == other.move_ID
-        return False
+        return NotImplemented # Con otro tipo, Python acaba comparando por identidad (False)
 
     def __hash__(self): # Importante para usar Movimiento en sets o como claves de diccionario
-        return hash(self.move_ID)
+        return self.move_ID # Un int pequeño ya es su propio hash
 
     # Para imprimir el movimiento en notación estándar de ajedrez (e.g., "e2e4")
     def get_chess_notation(self):
@@ -61,29 +268,38 @@ class Movimiento:
         return notacion
 
     def get_rank_file(self, r, c):
-        return self.cols_a_files[c] + self.filas_a_ranks[r]
+        return NOMBRES_CASILLAS[r * 8 + c]
 
     def __str__(self): # Representación en string para depuración
         return f"({self.fila_inicial},{self.col_inicial})->({self.fila_final},{self.col_final})" \
                f" (Captura: {self.pieza_capturada})"
 
 
-# Clase para rastrear el estado de los derechos de enroque.
-class DerechosEnroque:
-    def __init__(self, wks, wqs, bks, bqs):
-        self.wks = wks # Rey blanco lado corto (King side)
-        self.wqs = wqs # Rey blanco lado largo (Queen side)
-        self.bks = bks # Rey negro lado corto
-        self.bqs = bqs # Rey negro lado largo
-
-    def copiar(self):
-        return DerechosEnroque(self.wks, self.wqs, self.bks, self.bqs)
-
-    def __eq__(self, other):
-        if isinstance(other, DerechosEnroque):
-            return self.wks == other.wks and self.wqs == other.wqs and \
-                   self.bks == other.bks and self.bqs == other.bqs
-        return False
+# Derechos de enroque: un bit por cada uno, juntos en un entero de 0 a 15 (EstadoJuego.derechos_enroque_actuales).
+ENROQUE_CORTO_BLANCAS = 1 # Rey blanco lado corto (King side)
+ENROQUE_LARGO_BLANCAS = 2 # Rey blanco lado largo (Queen side)
+ENROQUE_CORTO_NEGRAS = 4  # Rey negro lado corto
+ENROQUE_LARGO_NEGRAS = 8  # Rey negro lado largo
+ENROQUE_TODOS = 15
+
+# Derechos que se conservan cuando un movimiento sale de una casilla o llega a ella: solo importan las casillas
+# iniciales de reyes y torres. Si sale otra pieza de ellas, o llega a ellas, ese derecho ya estaba perdido.
+ENROQUE_CONSERVADO = [ENROQUE_TODOS] * 64
+ENROQUE_CONSERVADO[0] = ENROQUE_TODOS & ~ENROQUE_LARGO_NEGRAS # a8: torre de reina negra
+ENROQUE_CONSERVADO[7] = ENROQUE_TODOS & ~ENROQUE_CORTO_NEGRAS # h8: torre de rey negra
+ENROQUE_CONSERVADO[56] = ENROQUE_TODOS & ~ENROQUE_LARGO_BLANCAS # a1: torre de reina blanca
+ENROQUE_CONSERVADO[63] = ENROQUE_TODOS & ~ENROQUE_CORTO_BLANCAS # h1: torre de rey blanca
+ENROQUE_CONSERVADO[4] = ENROQUE_CORTO_BLANCAS | ENROQUE_LARGO_BLANCAS # e8: rey negro
+ENROQUE_CONSERVADO[60] = ENROQUE_CORTO_NEGRAS | ENROQUE_LARGO_NEGRAS # e1: rey blanco
+
+# Enroques de cada color: (derecho, casillas que deben estar vacías, casillas por las que pasa el rey y que
+# no pueden estar atacadas, casilla final del rey). Las casillas van como bitboards (bit fila * 8 + col).
+ENROQUES = {
+    'w': ((ENROQUE_CORTO_BLANCAS, 1 << 61 | 1 << 62, 1 << 61 | 1 << 62, (7, 6)), # f1, g1
+          (ENROQUE_LARGO_BLANCAS, 1 << 57 | 1 << 58 | 1 << 59, 1 << 58 | 1 << 59, (7, 2))), # b1, c1, d1
+    'b': ((ENROQUE_CORTO_NEGRAS, 1 << 5 | 1 << 6, 1 << 5 | 1 << 6, (0, 6)), # f8, g8
+          (ENROQUE_LARGO_NEGRAS, 1 << 1 | 1 << 2 | 1 << 3, 1 << 2 | 1 << 3, (0, 2))), # b8, c8, d8
+}
 
 
 # Clase que representa el estado actual del juego de ajedrez.
@@ -101,11 +317,21 @@ class EstadoJuego:
         ]
         self.turno_blancas = True # True si es el turno de las blancas, False si es el de las negras.
         self.historial_movimientos = [] # Para almacenar los movimientos que se realizan
-        self.pos_en_passant_posible = () # Coordenadas de la casilla donde es posible el en passant
-                                         # (fila, col) donde un peón puede capturar en passant.
-
-        self.derechos_enroque_actuales = DerechosEnroque(True, True, True, True)
-        self.historial_derechos_enroque = [self.derechos_enroque_actuales.copiar()] # Historial de derechos de enroque
+        self.casilla_en_passant = -1 # Casilla (fila * 8 + col) a la que un peón puede capturar en passant, o -1
+
+        self.derechos_enroque_actuales = ENROQUE_TODOS # Bits ENROQUE_* de los enroques todavía posibles
+
+        # Bitboards de cada pieza ("wp", "bk", ...) y de las piezas de cada color, mantenidos en
+        # hacer/deshacer_movimiento junto con self.tablero (ver actualizar_bitboards).
+        self.bb = {color + tipo: 0 for color in "wb" for tipo in "pnbrqk"}
+        self.ocupacion = {'w': 0, 'b': 0}
+        casilla = 0
+        for fila in self.tablero:
+            for pieza in fila:
+                if pieza != "--":
+                    self.bb[pieza] |= 1 << casilla
+                    self.ocupacion[pieza[0]] |= 1 << casilla
+                casilla += 1
 
         self.pos_rey_blanco = (7, 4)
         self.pos_rey_negro = (0, 4)
@@ -115,25 +341,97 @@ class EstadoJuego:
         self.pins = []           # Lista de piezas que están "clavadas" (pinned)
         self.checks = []         # Lista de casillas desde donde el rey está siendo atacado (check)
 
+        # Evaluación (material + tablas de posición, blancas - negras), mantenida de forma incremental
+        # en hacer/deshacer_movimiento.
+        self.eval_score = self.calcular_evaluacion()
+
+        # Hash Zobrist de la posición, también incremental (ver hacer_movimiento).
+        self.zobrist = self.calcular_zobrist()
+
+        # Un registro por movimiento del historial con todo lo que deshacer_movimiento tiene que restaurar y
+        # no se deduce del propio movimiento: (derechos de enroque, casilla de en passant, evaluación, hash,
+        # jaque, pins, checks). Así deshacer no recalcula nada ni recorre el tablero.
+        self.historial_deshacer = []
+
         # Al inicio del juego, calcula el estado inicial del jaque, pins y checks.
         # Es importante llamar a esto para que self.jaque esté correcto desde el principio
         # antes de que se obtengan los movimientos legales.
         self.actualizar_pins_y_checks()
 
 
+    '''
+    Calcula la evaluación (material + posición) recorriendo todo el tablero.
+    Solo se usa al crear el estado; después se actualiza movimiento a movimiento.
+    '''
+    def calcular_evaluacion(self):
+        valor_casilla = VALOR_CASILLA # Variable local: evita buscar el global en cada casilla
+        score = 0
+        casilla = 0 # Índice plano fila * 8 + col
+        for fila in self.tablero:
+            for pieza in fila:
+                score += valor_casilla[pieza][casilla] # Las casillas vacías valen 0
+                casilla += 1
+        return score
+
+    '''
+    Calcula el hash Zobrist de la posición actual desde cero.
+    '''
+    def calcular_zobrist(self):
+        zobrist_piezas = ZOBRIST_PIEZAS
+        h = 0
+        casilla = 0 # Índice plano fila * 8 + col
+        for fila in self.tablero:
+            for pieza in fila:
+                h ^= zobrist_piezas[pieza][casilla] # Las casillas vacías aportan 0
+                casilla += 1
+        if not self.turno_blancas:
+            h ^= ZOBRIST_TURNO_NEGRAS
+        h ^= ZOBRIST_ENROQUE[self.derechos_enroque_actuales]
+        h ^= ZOBRIST_EN_PASSANT[self.casilla_en_passant]
+        return h
+
     '''
     Toma un objeto Movimiento como parámetro y lo ejecuta (mueve la pieza).
     No se encarga de la validación del movimiento (si es legal o no).
     '''
-    def hacer_movimiento(self, movimiento):
+    def hacer_movimiento(self, movimiento, actualizar_jaques=True):
         """
         Realiza un movimiento en el tablero, actualizando el estado del juego.
+        :param actualizar_jaques: Si es False, no se recalculan jaque, pins y checks para el nuevo turno
+                                  (la búsqueda de la IA muchas veces no los necesita). Entonces quien lo use
+                                  debe llamar a actualizar_pins_y_checks antes de obtener_movimientos_legales.
         """
+        # Guardar el estado que el movimiento va a cambiar (ver historial_deshacer en __init__).
+        self.historial_deshacer.append((self.derechos_enroque_actuales, self.casilla_en_passant,
+                                        self.eval_score, self.zobrist, self.jaque, self.pins, self.checks))
+
         self.tablero[movimiento.fila_inicial][movimiento.col_inicial] = "--"
         self.tablero[movimiento.fila_final][movimiento.col_final] = movimiento.pieza_movida
         self.historial_movimientos.append(movimiento) # Guarda el movimiento en el historial
         self.turno_blancas = not self.turno_blancas # Cambia el turno al siguiente jugador
 
+        # Actualizar el hash y la evaluación: sale la pieza de la casilla inicial, sale la capturada y entra
+        # la pieza (o la reina de la promoción) en la final. Turno, enroque y en passant se aplican más abajo.
+        casilla_inicial = movimiento.fila_inicial * 8 + movimiento.col_inicial
+        casilla_final = movimiento.fila_final * 8 + movimiento.col_final
+        if movimiento.es_en_passant_movimiento:
+            casilla_captura = movimiento.fila_inicial * 8 + movimiento.col_final
+        else:
+            casilla_captura = casilla_final # Si no hay captura, pieza_capturada es "--" y no cambia nada
+        pieza_final = movimiento.pieza_movida[0] + 'q' if movimiento.es_promocion_peon else movimiento.pieza_movida
+
+        h = self.zobrist ^ ZOBRIST_TURNO_NEGRAS
+        h ^= ZOBRIST_PIEZAS[movimiento.pieza_movida][casilla_inicial]
+        h ^= ZOBRIST_PIEZAS[movimiento.pieza_capturada][casilla_captura]
+        h ^= ZOBRIST_PIEZAS[pieza_final][casilla_final]
+        h ^= ZOBRIST_EN_PASSANT[self.casilla_en_passant]
+        h ^= ZOBRIST_ENROQUE[self.derechos_enroque_actuales]
+
+        self.eval_score += (VALOR_CASILLA[pieza_final][casilla_final]
+                            - VALOR_CASILLA[movimiento.pieza_movida][casilla_inicial]
+                            - VALOR_CASILLA[movimiento.pieza_capturada][casilla_captura])
+        self.actualizar_bitboards(movimiento)
+
         # Actualizar la posición del rey si se movió
         if movimiento.pieza_movida == 'wk':
             self.pos_rey_blanco = (movimiento.fila_final, movimiento.col_final)
@@ -151,30 +449,40 @@ class EstadoJuego:
             # El peón capturado está en la fila inicial del peón que se movió, y en la columna final
             self.tablero[movimiento.fila_inicial][movimiento.col_final] = "--"
 
-        # Actualizar pos_en_passant_posible
+        # Actualizar casilla_en_passant: la casilla por la que pasó el peón, a medio camino entre la inicial y la final
         if movimiento.pieza_movida[1] == 'p' and abs(movimiento.fila_inicial - movimiento.fila_final) == 2:
-            self.pos_en_passant_posible = ((movimiento.fila_inicial + movimiento.fila_final) // 2, movimiento.col_inicial)
+            self.casilla_en_passant = (casilla_inicial + casilla_final) // 2
         else:
-            self.pos_en_passant_posible = () # Resetear si el movimiento no es un avance de peón de dos casillas
+            self.casilla_en_passant = -1 # Resetear si el movimiento no es un avance de peón de dos casillas
+        h ^= ZOBRIST_EN_PASSANT[self.casilla_en_passant]
 
-        # Actualizar derechos de enroque
-        self.actualizar_derechos_enroque(movimiento)
-        self.historial_derechos_enroque.append(self.derechos_enroque_actuales.copiar())
+        # Actualizar derechos de enroque: se pierden al mover un rey o una torre, o al capturar una torre (ver ENROQUE_CONSERVADO).
+        self.derechos_enroque_actuales &= (ENROQUE_CONSERVADO[movimiento.fila_inicial * 8 + movimiento.col_inicial]
+                                           & ENROQUE_CONSERVADO[movimiento.fila_final * 8 + movimiento.col_final])
+        h ^= ZOBRIST_ENROQUE[self.derechos_enroque_actuales]
 
         # Enroque
         if movimiento.es_movimiento_enroque:
+            torre = movimiento.pieza_movida[0] + 'r'
+            fila_torre = movimiento.fila_final * 8
             if movimiento.col_final == 6: # Enroque corto (King side)
                 # Mover la torre: de (r,7) a (r,5)
                 self.tablero[movimiento.fila_final][5] = self.tablero[movimiento.fila_final][7]
                 self.tablero[movimiento.fila_final][7] = "--"
+                h ^= ZOBRIST_PIEZAS[torre][fila_torre + 7] ^ ZOBRIST_PIEZAS[torre][fila_torre + 5]
+                self.eval_score += VALOR_CASILLA[torre][fila_torre + 5] - VALOR_CASILLA[torre][fila_torre + 7]
             else: # Enroque largo (Queen side)
                 # Mover la torre: de (r,0) a (r,3)
                 self.tablero[movimiento.fila_final][3] = self.tablero[movimiento.fila_final][0]
                 self.tablero[movimiento.fila_final][0] = "--"
+                h ^= ZOBRIST_PIEZAS[torre][fila_torre] ^ ZOBRIST_PIEZAS[torre][fila_torre + 3]
+                self.eval_score += VALOR_CASILLA[torre][fila_torre + 3] - VALOR_CASILLA[torre][fila_torre]
+        self.zobrist = h
 
-        # Al final de hacer_movimiento, siempre recalcular los pins y checks para el *nuevo* estado del tablero.
+        # Al final de hacer_movimiento, recalcular los pins y checks para el *nuevo* estado del tablero.
         # Esto es crucial para que self.jaque esté correcto para la siguiente verificación.
-        self.actualizar_pins_y_checks()
+        if actualizar_jaques:
+            self.actualizar_pins_y_checks()
         # jaque_mate y ahogado deben ser calculados DESPUÉS de obtener_movimientos_legales,
         # no aquí directamente. Se ponen en False para que se recalcule.
         self.jaque_mate = False 
@@ -190,6 +498,10 @@ class EstadoJuego:
             self.tablero[movimiento.fila_inicial][movimiento.col_inicial] = movimiento.pieza_movida
             self.tablero[movimiento.fila_final][movimiento.col_final] = movimiento.pieza_capturada
             self.turno_blancas = not self.turno_blancas # Vuelve al turno del jugador anterior
+            self.actualizar_bitboards(movimiento) # El XOR se deshace aplicándolo otra vez
+            # Restaurar el resto del estado anterior tal como se guardó en hacer_movimiento (sin recalcularlo)
+            (self.derechos_enroque_actuales, self.casilla_en_passant, self.eval_score, self.zobrist,
+             self.jaque, self.pins, self.checks) = self.historial_deshacer.pop()
 
             # Actualizar la posición del rey si se deshizo su movimiento
             if movimiento.pieza_movida == 'wk':
@@ -203,17 +515,8 @@ class EstadoJuego:
                 self.tablero[movimiento.fila_final][movimiento.col_final] = "--" # La casilla de destino del peón capturador ahora está vacía
                 self.tablero[movimiento.fila_inicial][movimiento.col_final] = movimiento.pieza_capturada # Reponer el peón capturado
 
-            # Deshacer promoción de peón (volver a peón)
-            if movimiento.es_promocion_peon:
-                self.tablero[movimiento.fila_final][movimiento.col_final] = movimiento.pieza_movida # Vuelve a ser un peón
-
-            # Deshacer derechos de enroque
-            self.historial_derechos_enroque.pop() # Eliminar los derechos de enroque actuales
-            # Asegurarse de que no esté vacío antes de acceder
-            if len(self.historial_derechos_enroque) > 0:
-                self.derechos_enroque_actuales = self.historial_derechos_enroque[-1].copiar() # Restaurar los anteriores
-            else: # Caso borde: deshaciendo el primer movimiento
-                self.derechos_enroque_actuales = DerechosEnroque(True, True, True, True) # Resetear a los valores iniciales
+            # Deshacer promoción de peón: no hace falta nada más, la casilla inicial ya recibió el peón
+            # (pieza_movida) y la final la pieza capturada.
 
             # Deshacer enroque
             if movimiento.es_movimiento_enroque:
@@ -224,63 +527,40 @@ class EstadoJuego:
                     self.tablero[movimiento.fila_final][0] = self.tablero[movimiento.fila_final][3] # Mover torre de vuelta
                     self.tablero[movimiento.fila_final][3] = "--"
 
-            # Resetear pos_en_passant_posible al estado correcto después de deshacer
-            # Se debe basar en el movimiento *anterior* al que se acaba de deshacer
-            if len(self.historial_movimientos) == 0:
-                self.pos_en_passant_posible = ()
-            else:
-                ultimo_movimiento = self.historial_movimientos[-1]
-                if ultimo_movimiento.pieza_movida[1] == 'p' and abs(ultimo_movimiento.fila_inicial - ultimo_movimiento.fila_final) == 2:
-                    self.pos_en_passant_posible = ((ultimo_movimiento.fila_inicial + ultimo_movimiento.fila_final) // 2, ultimo_movimiento.col_inicial)
-                else:
-                    self.pos_en_passant_posible = ()
-
-            # --- Después de deshacer el movimiento, recalcular el estado de jaque/mate/ahogado ---
-            self.jaque_mate = False # Reseteamos al deshacer
-            self.ahogado = False    # Reseteamos al deshacer
-            self.actualizar_pins_y_checks() # Recalcular jaques y pins para el TURNO ACTUAL (que se acaba de restaurar)
+            # jaque_mate/ahogado se recalculan al obtener los movimientos legales de la posición restaurada
+            self.jaque_mate = False
+            self.ahogado = False
 
 
     '''
-    Actualiza los derechos de enroque basados en el movimiento.
+    Aplica a self.bb y self.ocupacion los cambios del movimiento con XOR: sale la pieza de la casilla
+    inicial, entra (o la reina de la promoción) en la final, sale la capturada y se mueve la torre del enroque.
+    Como el XOR es su propia inversa, deshacer_movimiento la llama igual para volver atrás.
     '''
-    def actualizar_derechos_enroque(self, movimiento):
-        # Si el rey blanco se mueve, pierde ambos derechos de enroque
-        if movimiento.pieza_movida == 'wk':
-            self.derechos_enroque_actuales.wks = False
-            self.derechos_enroque_actuales.wqs = False
-        # Si el rey negro se mueve, pierde ambos derechos de enroque
-        elif movimiento.pieza_movida == 'bk':
-            self.derechos_enroque_actuales.bks = False
-            self.derechos_enroque_actuales.bqs = False
-        # Si una torre se mueve de su posición inicial, pierde su derecho de enroque
-        elif movimiento.pieza_movida == 'wr':
-            if movimiento.fila_inicial == 7:
-                if movimiento.col_inicial == 7: # Torre de rey blanco
-                    self.derechos_enroque_actuales.wks = False
-                elif movimiento.col_inicial == 0: # Torre de reina blanca
-                    self.derechos_enroque_actuales.wqs = False
-        elif movimiento.pieza_movida == 'br':
-            if movimiento.fila_inicial == 0:
-                if movimiento.col_inicial == 7: # Torre de rey negro
-                    self.derechos_enroque_actuales.bks = False
-                elif movimiento.col_inicial == 0: # Torre de reina negro
-                    self.derechos_enroque_actuales.bqs = False
-
-        # Si una torre es capturada en su posición inicial, el oponente pierde el derecho de enroque con esa torre
-        # Nota: La pieza_capturada puede ser "--" si no hay captura
-        if movimiento.pieza_capturada == 'wr':
-            if movimiento.fila_final == 7:
-                if movimiento.col_final == 7:
-                    self.derechos_enroque_actuales.wks = False
-                elif movimiento.col_final == 0:
-                    self.derechos_enroque_actuales.wqs = False
-        elif movimiento.pieza_capturada == 'br':
-            if movimiento.fila_final == 0:
-                if movimiento.col_final == 7:
-                    self.derechos_enroque_actuales.bks = False
-                elif movimiento.col_final == 0:
-                    self.derechos_enroque_actuales.bqs = False
+    def actualizar_bitboards(self, movimiento):
+        bb = self.bb
+        ocupacion = self.ocupacion
+        color = movimiento.pieza_movida[0]
+        fila_final = movimiento.fila_final * 8
+        bit_inicial = 1 << (movimiento.fila_inicial * 8 + movimiento.col_inicial)
+        bit_final = 1 << (fila_final + movimiento.col_final)
+        bb[movimiento.pieza_movida] ^= bit_inicial
+        bb[color + 'q' if movimiento.es_promocion_peon else movimiento.pieza_movida] ^= bit_final
+        ocupacion[color] ^= bit_inicial | bit_final
+        if movimiento.es_captura:
+            if movimiento.es_en_passant_movimiento: # El peón capturado está al lado, en la fila inicial
+                bit_captura = 1 << (movimiento.fila_inicial * 8 + movimiento.col_final)
+            else:
+                bit_captura = bit_final
+            bb[movimiento.pieza_capturada] ^= bit_captura
+            ocupacion[movimiento.pieza_capturada[0]] ^= bit_captura
+        if movimiento.es_movimiento_enroque:
+            if movimiento.col_final == 6: # Enroque corto: torre de la columna 7 a la 5
+                bits_torre = (1 << (fila_final + 7)) | (1 << (fila_final + 5))
+            else: # Enroque largo: torre de la columna 0 a la 3
+                bits_torre = (1 << fila_final) | (1 << (fila_final + 3))
+            bb[color + 'r'] ^= bits_torre
+            ocupacion[color] ^= bits_torre
 
     '''
     Determina si el rey del jugador actual está en jaque, y qué piezas lo están atacando (checks)
@@ -302,88 +582,34 @@ class EstadoJuego:
             color_propio = 'b'
             color_oponente = 'w'
 
-        # Direcciones de ataque (lineales y diagonales)
-        direcciones = ((-1, 0), (0, -1), (1, 0), (0, 1), # Arriba, izquierda, abajo, derecha (Torres/Reinas)
-                       (-1, -1), (-1, 1), (1, -1), (1, 1)) # Diagonales (Alfiles/Reinas)
-        
-        # Recorrer las 8 direcciones para buscar atacantes lineales y diagonales
-        for i, (dr, dc) in enumerate(direcciones):
-            posible_pin = () # Almacena la ubicación de la pieza propia que podría estar clavada
-            for j in range(1, 8): # Buscar hasta 7 casillas en cada dirección
-                fila_final = fila_rey + dr * j
-                col_final = col_rey + dc * j
-                if 0 <= fila_final < 8 and 0 <= col_final < 8: # Dentro del tablero
-                    pieza_en_casilla = self.tablero[fila_final][col_final]
-                    if pieza_en_casilla == "--":
-                        continue # Casilla vacía, sigue buscando
-                    elif pieza_en_casilla[0] == color_propio: # Encontró una pieza propia
-                        if posible_pin == (): # Si es la primera pieza propia encontrada en esta línea
-                            posible_pin = (fila_final, col_final)
-                        else: # Si ya encontramos una pieza propia, significa que hay dos, así que no puede haber un pin
-                            break
-                    else: # Encontró una pieza oponente
-                        tipo_pieza_oponente = pieza_en_casilla[1]
-                        
-                        # Verifica si la pieza oponente ataca al rey
-                        # 1. Atacantes lineales (Torre/Reina)
-                        if i < 4 and (tipo_pieza_oponente == 'r' or tipo_pieza_oponente == 'q'):
-                            if posible_pin == (): # No hay pieza propia intermedia, es un jaque directo
-                                self.jaque = True
-                                self.checks.append((fila_final, col_final))
-                            else: # Hay una pieza propia intermedia, es un pin
-                                self.pins.append(posible_pin)
-                            break # Encontró un atacante, no seguir en esta dirección
-                        
-                        # 2. Atacantes diagonales (Alfil/Reina)
-                        elif i >= 4 and (tipo_pieza_oponente == 'b' or tipo_pieza_oponente == 'q'):
-                            if posible_pin == (): # Jaque directo
-                                self.jaque = True
-                                self.checks.append((fila_final, col_final))
-                            else: # Pin
-                                self.pins.append(posible_pin)
-                            break
-                        
-                        # 3. Peones (ataque diagonal)
-                        elif tipo_pieza_oponente == 'p':
-                            # Dirección del peón hacia el rey:
-                            # Peón blanco ataca hacia arriba (-1, -1) o (-1, 1)
-                            # Peón negro ataca hacia abajo (1, -1) o (1, 1)
-                            # Además, el peón solo ataca a una distancia de 1 casilla (j == 1)
-                            if (color_propio == 'w' and dr == 1 and abs(dc) == 1 and j == 1) or \
-                               (color_propio == 'b' and dr == -1 and abs(dc) == 1 and j == 1):
-                                if posible_pin == (): # Peón no puede dar pin, solo jaque directo (y solo si está adyacente)
-                                    self.jaque = True
-                                    self.checks.append((fila_final, col_final))
-                                break # Jaque de peón encontrado, no seguir en esta dirección
-                            else: # Si es un peón que no está atacando en la dirección correcta o está lejos
-                                break # Romper para evitar que un peón bloquee una línea de ataque de otra pieza
-                        
-                        # 4. Rey (ataque a distancia de 1, para detectar colisión de reyes)
-                        elif tipo_pieza_oponente == 'k':
-                            if j == 1: # Si el rey enemigo está a 1 casilla de distancia
-                                # Esto es para evitar que un rey se mueva a una casilla adyacente al otro rey
-                                # No resulta en jaque/pin en self.jaque/self.pins, es para validación de movimiento de rey
-                                # Se detectará en cuadrado_bajo_ataque, pero aquí bloquea la línea de visión
-                                pass # No añadimos a checks/pins, solo bloquea la línea
-                            break # El rey bloquea la línea
-                        
-                        else: # Cualquier otra pieza oponente (Caballo) o pieza que no ataca linealmente/diagonalmente
-                            break # Si no es un atacante relevante en esta dirección, bloquea la línea y rompemos
-
-                else: # Fuera del tablero
-                    break
-        
-        # --- Buscar ataques de caballo ---
-        movimientos_caballo_l = ((-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                                 (1, -2), (1, 2), (2, -1), (2, 1))
-        for dr, dc in movimientos_caballo_l:
-            fila_final = fila_rey + dr
-            col_final = col_rey + dc
-            if 0 <= fila_final < 8 and 0 <= col_final < 8:
-                pieza_en_casilla = self.tablero[fila_final][col_final]
-                if pieza_en_casilla != "--" and pieza_en_casilla[0] == color_oponente and pieza_en_casilla[1] == 'n':
-                    self.jaque = True
-                    self.checks.append((fila_final, col_final))
+        casilla_rey = fila_rey * 8 + col_rey
+        bb = self.bb
+        propias = self.ocupacion[color_propio]
+        ocupacion = propias | self.ocupacion[color_oponente]
+        reinas = bb[color_oponente + 'q']
+
+        # --- Jaques: las piezas enemigas que atacan la casilla del rey ---
+        atacantes = self.atacantes(casilla_rey, color_oponente, ocupacion)
+
+        # --- Pins: primero las líneas rectas (Torres/Reinas), luego las diagonales (Alfiles/Reinas) ---
+        for mascaras, tablas, deslizantes in ((MASCARA_TORRE, ATAQUES_TORRE, bb[color_oponente + 'r'] | reinas),
+                                              (MASCARA_ALFIL, ATAQUES_ALFIL, bb[color_oponente + 'b'] | reinas)):
+            mascara = mascaras[casilla_rey]
+            tabla = tablas[casilla_rey]
+            # Quitando las piezas propias que se ven desde el rey, las piezas enemigas que aparecen detrás
+            # (y que no daban ya jaque) son las que las clavan; la clavada es la única pieza entre ellas y el rey.
+            clavadoras = tabla[(ocupacion ^ (tabla[ocupacion & mascara] & propias)) & mascara] & deslizantes & ~atacantes
+            while clavadoras:
+                casilla = clavadoras.bit_length() - 1
+                clavadoras ^= 1 << casilla
+                self.pins.append(divmod((ENTRE[casilla_rey][casilla] & propias).bit_length() - 1, 8))
+
+        if atacantes:
+            self.jaque = True
+            while atacantes:
+                casilla = atacantes.bit_length() - 1
+                atacantes ^= 1 << casilla
+                self.checks.append(divmod(casilla, 8))
     
     # Esta función modificada de la que tenías para no usar obtener_movimientos_legales
     def cuadrado_bajo_ataque(self, fila, col):
@@ -393,69 +619,83 @@ class EstadoJuego:
         Verifica ataques del oponente del turno actual.
         """
         # El color de las piezas que estamos comprobando si atacan es el color del jugador OPUESTO al turno actual
-        color_atacante = 'b' if self.turno_blancas else 'w' 
-        
-        # 1. Ataques de peones
-        # Los peones blancos ('w') atacan en (r-1, c-1) y (r-1, c+1)
-        # Los peones negros ('b') atacan en (r+1, c-1) y (r+1, c+1)
-        if color_atacante == 'w':
-            if fila > 0: # Si no estamos en la fila 0 (borde superior)
-                if col > 0 and self.tablero[fila - 1][col - 1] == 'wp': 
-                    return True
-                if col < 7 and self.tablero[fila - 1][col + 1] == 'wp': 
-                    return True
-        else: # color_atacante == 'b'
-            if fila < 7: # Si no estamos en la fila 7 (borde inferior)
-                if col > 0 and self.tablero[fila + 1][col - 1] == 'bp': 
-                    return True
-                if col < 7 and self.tablero[fila + 1][col + 1] == 'bp': 
-                    return True
-
-        # 2. Ataques de caballos
-        movimientos_caballo_l = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
-        for dr, dc in movimientos_caballo_l:
-            r_destino, c_destino = fila + dr, col + dc
-            if 0 <= r_destino < 8 and 0 <= c_destino < 8:
-                pieza_destino = self.tablero[r_destino][c_destino]
-                if pieza_destino[0] == color_atacante and pieza_destino[1] == 'n':
-                    return True
-        
-        # 3. Ataques de torres, alfiles y reinas (deslizantes)
-        direcciones = ((-1, 0), (1, 0), (0, -1), (0, 1), # Ortogonales (Torre, Reina)
-                       (-1, -1), (-1, 1), (1, -1), (1, 1)) # Diagonales (Alfil, Reina)
-        
-        for i, (dr, dc) in enumerate(direcciones):
-            for j in range(1, 8): # Recorrer hasta el borde del tablero
-                r_destino, c_destino = fila + dr * j, col + dc * j
-                if 0 <= r_destino < 8 and 0 <= c_destino < 8:
-                    pieza_destino = self.tablero[r_destino][c_destino]
-                    if pieza_destino == "--":
-                        continue # Casilla vacía, sigue buscando
-                    elif pieza_destino[0] == color_atacante:
-                        tipo_pieza_atacante = pieza_destino[1]
-                        # Ortogonal (Torre o Reina)
-                        if i < 4 and (tipo_pieza_atacante == 'r' or tipo_pieza_atacante == 'q'):
-                            return True
-                        # Diagonal (Alfil o Reina)
-                        elif i >= 4 and (tipo_pieza_atacante == 'b' or tipo_pieza_atacante == 'q'):
-                            return True
-                        else: # Pieza del atacante que no amenaza en esta dirección (por ejemplo, un peón en una línea recta)
-                            break # Esta pieza bloquea la línea, pero no ataca la casilla
-                    else: # Pieza propia del rey que se está defendiendo o bloqueada por otra pieza enemiga
-                        break # Esta pieza bloquea la línea
-                else: # Fuera del tablero
-                    break
-        
-        # 4. Ataques de rey (para verificar si el rey se mueve a una casilla adyacente al rey enemigo)
-        movimientos_rey_adyacentes = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
-        for dr, dc in movimientos_rey_adyacentes:
-            r_destino, c_destino = fila + dr, col + dc
-            if 0 <= r_destino < 8 and 0 <= c_destino < 8:
-                pieza_destino = self.tablero[r_destino][c_destino]
-                if pieza_destino[0] == color_atacante and pieza_destino[1] == 'k':
-                    return True
-
-        return False
+        color_atacante = 'b' if self.turno_blancas else 'w'
+        return self.casilla_atacada(fila * 8 + col, color_atacante, self.ocupacion['w'] | self.ocupacion['b'])
+
+    def atacantes(self, casilla, color_atacante, ocupacion):
+        """
+        Devuelve el bitboard de las piezas de color_atacante que atacan la casilla (fila * 8 + col).
+        Cada tabla de ataques se usa al revés: una pieza ataca la casilla si está en las casillas que una pieza
+        de ese tipo atacaría desde ella (para los peones, un peón del otro color, porque atacan en sentido contrario).
+        :param ocupacion: Bitboard de las casillas ocupadas con el que se calculan los ataques deslizantes;
+                          puede ser el de una posición que todavía no está en el tablero (ver deja_rey_en_jaque).
+        """
+        bb = self.bb
+        reinas = bb[color_atacante + 'q']
+        return ((ATAQUES_PEON['w' if color_atacante == 'b' else 'b'][casilla] & bb[color_atacante + 'p'])
+                | (ATAQUES_CABALLO[casilla] & bb[color_atacante + 'n'])
+                | (ATAQUES_TORRE[casilla][ocupacion & MASCARA_TORRE[casilla]] & (bb[color_atacante + 'r'] | reinas))
+                | (ATAQUES_ALFIL[casilla][ocupacion & MASCARA_ALFIL[casilla]] & (bb[color_atacante + 'b'] | reinas))
+                | (ATAQUES_REY[casilla] & bb[color_atacante + 'k']))
+
+    def casillas_atacadas(self, color_atacante, ocupacion):
+        """
+        Devuelve el bitboard de todas las casillas que atacan las piezas de color_atacante
+        (estén vacías u ocupadas), con los ataques deslizantes calculados con la ocupación dada.
+        """
+        bb = self.bb
+        peones = bb[color_atacante + 'p']
+        if color_atacante == 'w': # Los peones blancos atacan hacia la fila 0, los negros hacia la 7
+            atacadas = ((peones & ~COLUMNA_A) >> 9) | ((peones & ~COLUMNA_H) >> 7)
+        else:
+            atacadas = ((peones & ~COLUMNA_A) << 7) | ((peones & ~COLUMNA_H) << 9)
+        atacadas |= ATAQUES_REY[bb[color_atacante + 'k'].bit_length() - 1]
+        reinas = bb[color_atacante + 'q']
+        caballos = bb[color_atacante + 'n']
+        while caballos:
+            casilla = caballos.bit_length() - 1
+            caballos ^= 1 << casilla
+            atacadas |= ATAQUES_CABALLO[casilla]
+        for piezas, mascaras, tablas in ((bb[color_atacante + 'r'] | reinas, MASCARA_TORRE, ATAQUES_TORRE),
+                                         (bb[color_atacante + 'b'] | reinas, MASCARA_ALFIL, ATAQUES_ALFIL)):
+            while piezas:
+                casilla = piezas.bit_length() - 1
+                piezas ^= 1 << casilla
+                atacadas |= tablas[casilla][ocupacion & mascaras[casilla]]
+        return atacadas
+
+    def casilla_atacada(self, casilla, color_atacante, ocupacion, capturada=0):
+        """
+        Determina si alguna pieza de color_atacante ataca la casilla (ver atacantes).
+        :param capturada: Bitboard con la pieza de color_atacante que se supone capturada (o 0), que no ataca.
+        """
+        return self.atacantes(casilla, color_atacante, ocupacion) & ~capturada != 0
+
+    def deja_rey_en_jaque(self, movimiento):
+        """
+        Indica si un movimiento del jugador al que le toca deja a su propio rey atacado, sin hacerlo:
+        se calcula la ocupación que tendría el tablero después del movimiento y se comprueba la casilla del rey.
+        Cubre los pins y los jaques que el movimiento no resuelve, y los movimientos del propio rey.
+        """
+        color = movimiento.pieza_movida[0]
+        casilla_final = movimiento.fila_final * 8 + movimiento.col_final
+        bit_final = 1 << casilla_final
+        ocupacion = ((self.ocupacion['w'] | self.ocupacion['b'])
+                     & ~(1 << (movimiento.fila_inicial * 8 + movimiento.col_inicial)) | bit_final)
+        if movimiento.es_en_passant_movimiento: # El peón capturado desaparece de su casilla, al lado
+            capturada = 1 << (movimiento.fila_inicial * 8 + movimiento.col_final)
+            ocupacion ^= capturada
+        elif movimiento.es_captura:
+            capturada = bit_final
+        else:
+            capturada = 0
+        if movimiento.pieza_movida[1] == 'k':
+            casilla_rey = casilla_final
+        elif color == 'w':
+            casilla_rey = self.pos_rey_blanco[0] * 8 + self.pos_rey_blanco[1]
+        else:
+            casilla_rey = self.pos_rey_negro[0] * 8 + self.pos_rey_negro[1]
+        return self.casilla_atacada(casilla_rey, 'b' if color == 'w' else 'w', ocupacion, capturada)
 
     '''
     Todos los movimientos válidos considerando jaques, pins y checks.
@@ -463,85 +703,48 @@ class EstadoJuego:
     def obtener_movimientos_legales(self):
         # NOTA IMPORTANTE: self.actualizar_pins_y_checks() debe ser llamado
         # ANTES de obtener_movimientos_legales para que self.jaque, self.pins y self.checks
-        # estén actualizados para el turno actual. Esto ya se hace en __init__ y hacer_movimiento.
-
-        movimientos_legales_actuales = []
-        
-        # Guardar el estado actual del turno para restaurarlo si es necesario
-        turno_original = self.turno_blancas
-
-        # Si el rey está en jaque
-        if self.jaque:
-            if len(self.checks) == 1: # Un solo jaque
-                # Obtener todos los movimientos posibles (brutos)
-                movimientos_posibles = self.obtener_todos_los_movimientos_posibles()
-                
-                # Iterar sobre los movimientos posibles y verificar si son legales
-                for mov in movimientos_posibles:
-                    self.hacer_movimiento(mov)
-                    # Después de hacer_movimiento, self.turno_blancas está invertido.
-                    # Para verificar el jaque del REY QUE ACABA DE MOVER, necesitamos
-                    # que self.turno_blancas esté como estaba antes del movimiento simulado.
-                    self.turno_blancas = not self.turno_blancas # Temporalmente restauramos el turno original para la verificación
-                    
-                    self.actualizar_pins_y_checks() # Recalculamos jaque/pins/checks para el rey del jugador que acaba de mover
-                                                    # self.jaque ahora refleja si el rey del jugador original está en jaque.
-
-                    if not self.jaque: # Si el rey NO está en jaque después del movimiento simulado
-                        movimientos_legales_actuales.append(mov)
-                    
-                    self.turno_blancas = not self.turno_blancas # Volvemos a invertir el turno para que deshacer_movimiento lo restaure correctamente
-                    self.deshacer_movimiento() # Deshacer el movimiento simulado
-            else: # Doble jaque: La única forma de salir es mover el rey
-                # Obtener solo los movimientos del rey
-                movimientos_posibles_rey = []
-                if self.turno_blancas:
-                    self.get_movimientos_rey(self.pos_rey_blanco[0], self.pos_rey_blanco[1], movimientos_posibles_rey)
-                else:
-                    self.get_movimientos_rey(self.pos_rey_negro[0], self.pos_rey_negro[1], movimientos_posibles_rey)
-                
-                for mov in movimientos_posibles_rey:
-                    self.hacer_movimiento(mov)
-                    self.turno_blancas = not self.turno_blancas # Temporalmente restauramos el turno original
-                    self.actualizar_pins_y_checks() # Recalculamos
-                    if not self.jaque: # Si el rey NO está en jaque después de mover
-                        movimientos_legales_actuales.append(mov)
-                    self.turno_blancas = not self.turno_blancas # Volvemos a invertir el turno
-                    self.deshacer_movimiento()
-        
-        else: # El rey no está en jaque (puede haber pins)
-            movimientos_posibles = self.obtener_todos_los_movimientos_posibles()
-            
-            # Filtrar movimientos que dejarían el rey en jaque (esto cubre los pins)
-            for mov in movimientos_posibles:
-                self.hacer_movimiento(mov) # Simular el movimiento
-                
-                # Después de hacer_movimiento, self.turno_blancas está invertido.
-                # Para verificar el jaque del REY QUE ACABA DE MOVER, necesitamos
-                # que self.turno_blancas esté como estaba antes del movimiento simulado.
-                self.turno_blancas = not self.turno_blancas # Temporalmente restauramos el turno original para la verificación
-                
-                self.actualizar_pins_y_checks() # Recalculamos jaque/pins/checks para el rey del jugador que acaba de mover
-                                                # self.jaque ahora refleja si el rey del jugador original está en jaque.
-                
-                if not self.jaque: # Si el rey NO está en jaque después del movimiento simulado
-                    movimientos_legales_actuales.append(mov)
-                
-                self.turno_blancas = not self.turno_blancas # Volvemos a invertir el turno para que deshacer_movimiento lo restaure correctamente
-                self.deshacer_movimiento() # Deshacer el movimiento para restaurar el tablero
-            
-            # Generar movimientos de enroque (solo si no está en jaque, que ya se verificó)
-            # Y si no hay piezas en medio o casillas atacadas.
-            # Se llama aquí y no en obtener_todos_los_movimientos_posibles porque requiere
-            # la verificación de casillas bajo ataque (que dependen de la legalidad del movimiento).
-            # Esta llamada NO DEBE MODIFICAR self.turno_blancas, por lo que lo restauramos si se cambia
-            # temporalmente en este bloque.
-            self.turno_blancas = turno_original # Aseguramos que el turno sea el correcto para get_movimientos_enroque
-            if self.turno_blancas: 
-                self.get_movimientos_enroque(self.pos_rey_blanco[0], self.pos_rey_blanco[1], movimientos_legales_actuales)
-            else: 
-                self.get_movimientos_enroque(self.pos_rey_negro[0], self.pos_rey_negro[1], movimientos_legales_actuales)
-            self.turno_blancas = turno_original # Restaurar el turno original después de get_movimientos_enroque
+        # estén actualizados para el turno actual. Esto ya se hace en __init__ y hacer_movimiento
+        # (salvo con hacer_movimiento(..., actualizar_jaques=False)).
+
+        # Los movimientos se generan ya legales: cada pieza solo se mueve a las casillas permitidas. El rey, a las
+        # que el rival no ataca; una pieza clavada, por su línea con el rey; y con un jaque, hay que capturar la
+        # pieza que lo da o ponerse entre ella y el rey. Solo los en passant (que quitan dos piezas de la fila
+        # del rey, o capturan al peón que da jaque sin ir a su casilla) se comprueban después con deja_rey_en_jaque.
+        pos_rey = self.pos_rey_blanco if self.turno_blancas else self.pos_rey_negro
+        casilla_rey = pos_rey[0] * 8 + pos_rey[1]
+        # Casillas atacadas por el rival, calculadas una vez: el rey se quita de la ocupación, porque una pieza
+        # que le da jaque en línea sigue atacando la casilla que queda detrás del rey. Si en una de ellas hay
+        # una pieza rival defendida, el rey tampoco puede capturarla.
+        atacadas = self.casillas_atacadas('b' if self.turno_blancas else 'w',
+                                          (self.ocupacion['w'] | self.ocupacion['b']) ^ (1 << casilla_rey))
+
+        if len(self.checks) > 1: # Doble jaque: La única forma de salir es mover el rey
+            movimientos_legales_actuales = []
+            self.get_movimientos_rey(pos_rey[0], pos_rey[1], movimientos_legales_actuales, ~atacadas)
+        else:
+            if self.jaque: # Un solo jaque
+                # Casillas que resuelven el jaque sin mover el rey: la de la pieza que lo da y las de en medio.
+                # Una pieza clavada nunca puede tapar ni capturar: su línea con el rey no pasa por ellas.
+                fila_jaque, col_jaque = self.checks[0]
+                casilla_jaque = fila_jaque * 8 + col_jaque
+                permitidas = ENTRE[casilla_rey][casilla_jaque] | (1 << casilla_jaque)
+            else:
+                permitidas = -1 # Todas las casillas
+            clavadas = 0
+            for fila, col in self.pins:
+                clavadas |= 1 << (fila * 8 + col)
+            movimientos_legales_actuales = self.obtener_todos_los_movimientos_posibles(~atacadas, permitidas, clavadas)
+            if self.casilla_en_passant != -1:
+                deja_rey_en_jaque = self.deja_rey_en_jaque
+                movimientos_legales_actuales = [mov for mov in movimientos_legales_actuales
+                                                if not mov.es_en_passant_movimiento or not deja_rey_en_jaque(mov)]
+
+            if not self.jaque:
+                # Generar movimientos de enroque (solo si no está en jaque)
+                # Y si no hay piezas en medio o casillas atacadas.
+                # Se llama aquí y no en obtener_todos_los_movimientos_posibles porque requiere
+                # la verificación de casillas bajo ataque (que dependen de la legalidad del movimiento).
+                self.get_movimientos_enroque(pos_rey[0], pos_rey[1], movimientos_legales_actuales, atacadas)
 
         # Verificar Jaque Mate / Ahogado
         # Estos se verifican DESPUÉS de haber calculado TODOS los movimientos legales.
@@ -561,174 +764,178 @@ class EstadoJuego:
     '''
     Todos los movimientos posibles sin considerar jaques.
     '''
-    def obtener_todos_los_movimientos_posibles(self): 
+    def obtener_todos_los_movimientos_posibles(self, permitidas_rey=-1, permitidas=-1, clavadas=0):
         """
         Genera todos los movimientos posibles (brutos) en el tablero para el jugador actual,
         sin considerar si dejan al rey en jaque.
+        Las piezas se sacan del bitboard de ocupación del jugador (que hace de lista de piezas),
+        en lugar de recorrer las 64 casillas del tablero buscando las suyas. Se toman de la casilla
+        más baja a la más alta: el mismo orden que el recorrido del tablero por filas. Los peones que no
+        están clavados van aparte, todos a la vez, al final (ver get_movimientos_peones).
+        obtener_movimientos_legales usa los parámetros para que salgan ya legales:
+        :param permitidas_rey: Bitboard de las casillas a las que puede ir el rey.
+        :param permitidas: Bitboard de las casillas a las que pueden ir las demás piezas (salvo en passant).
+        :param clavadas: Bitboard de las piezas clavadas, que además solo se mueven por su línea con el rey.
         """
         movimientos = []
-        for fila in range(len(self.tablero)):
-            for col in range(len(self.tablero[fila])):
-                pieza = self.tablero[fila][col]
-                if pieza == "--": # Si la casilla está vacía, continuar
-                    continue
-
-                turno = pieza[0] # 'w' o 'b'
-                if (turno == 'w' and self.turno_blancas) or \
-                   (turno == 'b' and not self.turno_blancas):
-                    tipo_pieza = pieza[1] # 'p', 'r', 'n', 'b', 'q', 'k'
-                    
-                    # Llamamos a la función específica para cada tipo de pieza
-                    if tipo_pieza == 'p':
-                        self.get_movimientos_peon(fila, col, movimientos)
-                    elif tipo_pieza == 'r':
-                        self.get_movimientos_torre(fila, col, movimientos)
-                    elif tipo_pieza == 'n':
-                        self.get_movimientos_caballo(fila, col, movimientos)
-                    elif tipo_pieza == 'b':
-                        self.get_movimientos_alfil(fila, col, movimientos)
-                    elif tipo_pieza == 'q':
-                        self.get_movimientos_reina(fila, col, movimientos)
-                    elif tipo_pieza == 'k':
-                        self.get_movimientos_rey(fila, col, movimientos) 
+        color = 'w' if self.turno_blancas else 'b'
+        # Llamamos a la función específica para cada tipo de pieza
+        generadores = {'p': self.get_movimientos_peon, 'n': self.get_movimientos_caballo, 'b': self.get_movimientos_alfil,
+                       'r': self.get_movimientos_torre, 'q': self.get_movimientos_reina, 'k': self.get_movimientos_rey}
+        if clavadas:
+            pos_rey = self.pos_rey_blanco if self.turno_blancas else self.pos_rey_negro
+            linea_rey = LINEA[pos_rey[0] * 8 + pos_rey[1]]
+        peones = self.bb[color + 'p'] & ~clavadas
+        piezas = self.ocupacion[color] ^ peones
+        tablero = self.tablero
+        while piezas:
+            bit = piezas & -piezas # La casilla más baja: aquí sí importa el orden (el de la ordenación en empates)
+            piezas ^= bit
+            casilla = bit.bit_length() - 1
+            fila, col = casilla >> 3, casilla & 7
+            tipo = tablero[fila][col][1]
+            if tipo == 'k':
+                generadores['k'](fila, col, movimientos, permitidas_rey)
+            elif clavadas & bit:
+                generadores[tipo](fila, col, movimientos, permitidas & linea_rey[casilla])
+            else:
+                generadores[tipo](fila, col, movimientos, permitidas)
+        if peones:
+            self.get_movimientos_peones(peones, movimientos, permitidas)
         return movimientos
 
     # --- Funciones para generar movimientos de cada pieza (brutos) ---
+    # Todas reciben en permitidas el bitboard de las casillas a las que se pueden mover (por defecto todas).
 
-    def get_movimientos_peon(self, r, c, movimientos):
+    def get_movimientos_peones(self, peones, movimientos, permitidas=-1):
+        """
+        Genera los movimientos de todos los peones del bitboard peones (del jugador al que le toca) a la vez:
+        desplazando el bitboard una fila salen de golpe los avances de todos, y desplazándolo en diagonal
+        (sin los de la columna del borde, que se saldrían del tablero) sus capturas. Luego se recorre cada
+        conjunto de destinos; el origen de cada uno está siempre a la misma distancia.
+        Los peones clavados no pueden ir aquí: cada uno tiene su línea (ver get_movimientos_peon).
+        """
+        vacias = ~(self.ocupacion['w'] | self.ocupacion['b'])
+        if self.turno_blancas: # Los peones blancos avanzan hacia la fila 0 (casillas más bajas)
+            enemigas = self.ocupacion['b']
+            avances = (peones >> 8) & vacias
+            dobles = ((avances & FILA_DOBLE_AVANCE['w']) >> 8) & vacias
+            # (destinos, distancia del destino al origen)
+            grupos = ((avances & permitidas, 8), (dobles & permitidas, 16),
+                      (((peones & ~COLUMNA_A) >> 9) & enemigas & permitidas, 9),
+                      (((peones & ~COLUMNA_H) >> 7) & enemigas & permitidas, 7))
+        else:
+            enemigas = self.ocupacion['w']
+            avances = (peones << 8) & vacias
+            dobles = ((avances & FILA_DOBLE_AVANCE['b']) << 8) & vacias
+            grupos = ((avances & permitidas, -8), (dobles & permitidas, -16),
+                      (((peones & ~COLUMNA_A) << 7) & enemigas & permitidas, -7),
+                      (((peones & ~COLUMNA_H) << 9) & enemigas & permitidas, -9))
+        tablero = self.tablero
+        agregar = movimientos.append
+        # De la casilla más baja a la más alta, como agregar_movimientos: la IA desempata por ese orden (ver "Bitboards").
+        for destinos, distancia in grupos:
+            while destinos:
+                bit = destinos & -destinos
+                destinos ^= bit
+                casilla = bit.bit_length() - 1
+                agregar(Movimiento(divmod(casilla + distancia, 8), divmod(casilla, 8), tablero))
+        # En passant: capturan los peones que están donde un peón del rival atacaría desde la casilla de en passant.
+        # No se limita a permitidas: obtener_movimientos_legales lo comprueba aparte.
+        casilla_ep = self.casilla_en_passant
+        if casilla_ep != -1:
+            capturadores = ATAQUES_PEON['b' if self.turno_blancas else 'w'][casilla_ep] & peones
+            while capturadores:
+                bit = capturadores & -capturadores # También de la más baja a la más alta
+                capturadores ^= bit
+                agregar(Movimiento(divmod(bit.bit_length() - 1, 8), divmod(casilla_ep, 8), tablero,
+                                   en_passant_posible=True))
+
+    def get_movimientos_peon(self, r, c, movimientos, permitidas=-1):
+        # Un solo peón: obtener_todos_los_movimientos_posibles la usa para los clavados (el resto, get_movimientos_peones)
         pieza_color = self.tablero[r][c][0]
-        
-        if pieza_color == 'w': # Peones blancos
-            # Avance de una casilla
-            if r - 1 >= 0 and self.tablero[r - 1][c] == "--":
-                movimientos.append(Movimiento((r, c), (r - 1, c), self.tablero))
-                # Avance de dos casillas (solo desde la fila inicial)
-                if r == 6 and self.tablero[r - 2][c] == "--": # Check the square in front of it as well
-                    movimientos.append(Movimiento((r, c), (r - 2, c), self.tablero))
-            
-            # Capturas diagonales
-            # Captura a la izquierda
-            if c - 1 >= 0: 
-                if r - 1 >= 0 and self.tablero[r - 1][c - 1][0] == 'b': # Pieza negra
-                    movimientos.append(Movimiento((r, c), (r - 1, c - 1), self.tablero))
-                elif (r - 1, c - 1) == self.pos_en_passant_posible: # En passant
-                    movimientos.append(Movimiento((r, c), (r - 1, c - 1), self.tablero, en_passant_posible=True))
-            # Captura a la derecha
-            if c + 1 < 8:
-                if r - 1 >= 0 and self.tablero[r - 1][c + 1][0] == 'b': # Pieza negra
-                    movimientos.append(Movimiento((r, c), (r - 1, c + 1), self.tablero))
-                elif (r - 1, c + 1) == self.pos_en_passant_posible: # En passant
-                    movimientos.append(Movimiento((r, c), (r - 1, c + 1), self.tablero, en_passant_posible=True))
-
-        else: # Peones negros
-            # Avance de una casilla
-            if r + 1 < 8 and self.tablero[r + 1][c] == "--":
-                movimientos.append(Movimiento((r, c), (r + 1, c), self.tablero))
-                # Avance de dos casillas (solo desde la fila inicial)
-                if r == 1 and self.tablero[r + 2][c] == "--": # Check the square in front of it as well
-                    movimientos.append(Movimiento((r, c), (r + 2, c), self.tablero))
-            
-            # Capturas diagonales
-            # Captura a la izquierda
-            if c - 1 >= 0:
-                if r + 1 < 8 and self.tablero[r + 1][c - 1][0] == 'w': # Pieza blanca
-                    movimientos.append(Movimiento((r, c), (r + 1, c - 1), self.tablero))
-                elif (r + 1, c - 1) == self.pos_en_passant_posible: # En passant
-                    movimientos.append(Movimiento((r, c), (r + 1, c - 1), self.tablero, en_passant_posible=True))
-            # Captura a la derecha
-            if c + 1 < 8:
-                if r + 1 < 8 and self.tablero[r + 1][c + 1][0] == 'w': # Pieza blanca
-                    movimientos.append(Movimiento((r, c), (r + 1, c + 1), self.tablero))
-                elif (r + 1, c + 1) == self.pos_en_passant_posible: # En passant
-                    movimientos.append(Movimiento((r, c), (r + 1, c + 1), self.tablero, en_passant_posible=True))
-
-    def get_movimientos_torre(self, r, c, movimientos):
-        direcciones = ((-1, 0), (0, -1), (1, 0), (0, 1)) # Arriba, izquierda, abajo, derecha
-        color_propio = self.tablero[r][c][0]
-        color_oponente = 'b' if color_propio == 'w' else 'w'
-        for dr, dc in direcciones:
-            for i in range(1, 8): # Puede moverse hasta 7 casillas en una dirección
-                end_r, end_c = r + dr * i, c + dc * i
-                if 0 <= end_r < 8 and 0 <= end_c < 8: # Dentro del tablero
-                    pieza_final = self.tablero[end_r][end_c]
-                    if pieza_final == "--": # Casilla vacía
-                        movimientos.append(Movimiento((r, c), (end_r, end_c), self.tablero))
-                    elif pieza_final[0] == color_oponente: # Pieza enemiga
-                        movimientos.append(Movimiento((r, c), (end_r, end_c), self.tablero))
-                        break # Se detiene al capturar
-                    else: # Pieza amiga
-                        break # Se detiene al chocar con una pieza propia
-                else: # Fuera del tablero
-                    break
-
-    def get_movimientos_caballo(self, r, c, movimientos):
-        movimientos_caballo_l = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
-        color_propio = self.tablero[r][c][0]
-        for dr, dc in movimientos_caballo_l:
-            end_r, end_c = r + dr, c + dc
-            if 0 <= end_r < 8 and 0 <= end_c < 8: # Dentro del tablero
-                pieza_final = self.tablero[end_r][end_c]
-                if pieza_final[0] != color_propio: # No es una pieza amiga (puede ser vacía o enemiga)
-                    movimientos.append(Movimiento((r, c), (end_r, end_c), self.tablero))
-
-    def get_movimientos_alfil(self, r, c, movimientos):
-        direcciones = ((-1, -1), (-1, 1), (1, -1), (1, 1)) # 4 diagonales
-        color_propio = self.tablero[r][c][0]
-        color_oponente = 'b' if color_propio == 'w' else 'w'
-        for dr, dc in direcciones:
-            for i in range(1, 8):
-                end_r, end_c = r + dr * i, c + dc * i
-                if 0 <= end_r < 8 and 0 <= end_c < 8:
-                    pieza_final = self.tablero[end_r][end_c]
-                    if pieza_final == "--":
-                        movimientos.append(Movimiento((r, c), (end_r, end_c), self.tablero))
-                    elif pieza_final[0] == color_oponente:
-                        movimientos.append(Movimiento((r, c), (end_r, end_c), self.tablero))
-                        break
-                    else: # Pieza amiga
-                        break
-                else: # Fuera del tablero
-                    break
-
-    def get_movimientos_reina(self, r, c, movimientos):
+        casilla = r * 8 + c
+        vacias = ~(self.ocupacion['w'] | self.ocupacion['b'])
+        if pieza_color == 'w': # Los peones blancos avanzan hacia la fila 0, los negros hacia la 7
+            paso, fila_inicial, color_oponente = -8, 6, 'b'
+        else:
+            paso, fila_inicial, color_oponente = 8, 1, 'w'
+
+        # Avance de una casilla (un peón nunca está en la última fila: ahí ya ha promocionado)
+        destino = casilla + paso
+        if vacias >> destino & 1:
+            if permitidas >> destino & 1:
+                movimientos.append(Movimiento((r, c), divmod(destino, 8), self.tablero))
+            # Avance de dos casillas (solo desde la fila inicial y con las dos casillas vacías)
+            if r == fila_inicial and (vacias & permitidas) >> (destino + paso) & 1:
+                movimientos.append(Movimiento((r, c), divmod(destino + paso, 8), self.tablero))
+
+        # Capturas diagonales: las casillas que ataca el peón con una pieza enemiga
+        ataques = ATAQUES_PEON[pieza_color][casilla]
+        self.agregar_movimientos(r, c, ataques & self.ocupacion[color_oponente] & permitidas, movimientos)
+        # En passant: la casilla de en passant está vacía, así que no coincide con las capturas normales.
+        # No se limita a permitidas: obtener_movimientos_legales lo comprueba aparte.
+        casilla_ep = self.casilla_en_passant
+        if casilla_ep != -1 and ataques >> casilla_ep & 1:
+            movimientos.append(Movimiento((r, c), divmod(casilla_ep, 8), self.tablero, en_passant_posible=True))
+
+    # Las demás piezas sacan sus casillas de destino de las tablas de ataques, quitando las ocupadas por piezas propias.
+
+    def get_movimientos_torre(self, r, c, movimientos, permitidas=-1):
+        casilla = r * 8 + c
+        ocupacion = self.ocupacion['w'] | self.ocupacion['b']
+        destinos = ATAQUES_TORRE[casilla][ocupacion & MASCARA_TORRE[casilla]] & ~self.ocupacion[self.tablero[r][c][0]]
+        self.agregar_movimientos(r, c, destinos & permitidas, movimientos)
+
+    def get_movimientos_caballo(self, r, c, movimientos, permitidas=-1):
+        casilla = r * 8 + c
+        destinos = ATAQUES_CABALLO[casilla] & ~self.ocupacion[self.tablero[r][c][0]]
+        self.agregar_movimientos(r, c, destinos & permitidas, movimientos)
+
+    def get_movimientos_alfil(self, r, c, movimientos, permitidas=-1):
+        casilla = r * 8 + c
+        ocupacion = self.ocupacion['w'] | self.ocupacion['b']
+        destinos = ATAQUES_ALFIL[casilla][ocupacion & MASCARA_ALFIL[casilla]] & ~self.ocupacion[self.tablero[r][c][0]]
+        self.agregar_movimientos(r, c, destinos & permitidas, movimientos)
+
+    def get_movimientos_reina(self, r, c, movimientos, permitidas=-1):
         # La reina combina los movimientos de la torre y el alfil
-        self.get_movimientos_torre(r, c, movimientos)
-        self.get_movimientos_alfil(r, c, movimientos)
-
-    def get_movimientos_rey(self, r, c, movimientos):
-        movimientos_rey = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
-        color_propio = self.tablero[r][c][0]
-        for dr, dc in movimientos_rey:
-            end_r, end_c = r + dr, c + dc
-            if 0 <= end_r < 8 and 0 <= end_c < 8:
-                pieza_final = self.tablero[end_r][end_c]
-                if pieza_final[0] != color_propio: # No es una pieza amiga
-                    # Los movimientos del rey se validan para no ir a una casilla atacada
-                    # directamente en `obtener_movimientos_legales` llamando a `cuadrado_bajo_ataque`
-                    # para cada movimiento posible del rey. Aquí solo generamos los movimientos "brutos".
-                    movimientos.append(Movimiento((r, c), (end_r, end_c), self.tablero))
-
-    def get_movimientos_enroque(self, r, c, movimientos):
+        casilla = r * 8 + c
+        ocupacion = self.ocupacion['w'] | self.ocupacion['b']
+        destinos = ((ATAQUES_TORRE[casilla][ocupacion & MASCARA_TORRE[casilla]]
+                     | ATAQUES_ALFIL[casilla][ocupacion & MASCARA_ALFIL[casilla]])
+                    & ~self.ocupacion[self.tablero[r][c][0]])
+        self.agregar_movimientos(r, c, destinos & permitidas, movimientos)
+
+    def get_movimientos_rey(self, r, c, movimientos, permitidas=-1):
+        # `obtener_movimientos_legales` pasa en permitidas las casillas que no ataca el rival (ver casillas_atacadas).
+        casilla = r * 8 + c
+        destinos = ATAQUES_REY[casilla] & ~self.ocupacion[self.tablero[r][c][0]]
+        self.agregar_movimientos(r, c, destinos & permitidas, movimientos)
+
+    def agregar_movimientos(self, r, c, destinos, movimientos):
+        """
+        Añade a movimientos un Movimiento desde (r, c) a cada casilla del bitboard destinos,
+        de la casilla más baja a la más alta: la IA desempata por el orden de la lista (ver "Bitboards").
+        """
+        # Todo lo que se usa en el bucle en variables locales: es la parte más repetida de la generación.
+        tablero = self.tablero
+        agregar = movimientos.append
+        origen = (r, c)
+        while destinos:
+            bit = destinos & -destinos
+            destinos ^= bit
+            agregar(Movimiento(origen, divmod(bit.bit_length() - 1, 8), tablero))
+
+    def get_movimientos_enroque(self, r, c, movimientos, atacadas):
+        # atacadas: bitboard de las casillas que ataca el rival (ver casillas_atacadas)
         # El enroque solo es posible si el rey no está en jaque
         if self.jaque:
             return
 
-        # Enroque corto (King side)
-        if (self.turno_blancas and self.derechos_enroque_actuales.wks) or \
-           (not self.turno_blancas and self.derechos_enroque_actuales.bks):
-            # Cuidado: Asumo que c+1 y c+2 son las casillas por donde pasa el rey, es decir, el rey está en (r,c)
-            # y se mueve a (r, c+2). Las casillas (r, c+1) y (r, c+2) deben estar vacías y no atacadas.
-            if self.tablero[r][c + 1] == "--" and self.tablero[r][c + 2] == "--":
-                # Las casillas por las que pasa el rey no deben estar bajo ataque
-                if not self.cuadrado_bajo_ataque(r, c + 1) and not self.cuadrado_bajo_ataque(r, c + 2):
-                    movimientos.append(Movimiento((r, c), (r, c + 2), self.tablero, enroque_movimiento=True))
-
-        # Enroque largo (Queen side)
-        if (self.turno_blancas and self.derechos_enroque_actuales.wqs) or \
-           (not self.turno_blancas and self.derechos_enroque_actuales.bqs):
-            # Rey se mueve a (r, c-2). Las casillas (r, c-1), (r, c-2) y (r, c-3) deben estar vacías.
-            # Y (r, c-1), (r, c-2) no deben estar atacadas.
-            if self.tablero[r][c - 1] == "--" and self.tablero[r][c - 2] == "--" and self.tablero[r][c - 3] == "--":
-                # Las casillas por las que pasa el rey no deben estar bajo ataque
-                if not self.cuadrado_bajo_ataque(r, c - 1) and not self.cuadrado_bajo_ataque(r, c - 2):
-                    movimientos.append(Movimiento((r, c), (r, c - 2), self.tablero, enroque_movimiento=True))
\ No newline at end of file
+        # Primero el enroque corto (King side) y luego el largo (Queen side), ver ENROQUES. Si queda el derecho,
+        # el rey y la torre siguen en sus casillas iniciales.
+        ocupacion = self.ocupacion['w'] | self.ocupacion['b']
+        for derecho, vacias, paso_rey, destino in ENROQUES['w' if self.turno_blancas else 'b']:
+            if self.derechos_enroque_actuales & derecho and not ocupacion & vacias and not atacadas & paso_rey:
+                movimientos.append(Movimiento((r, c), destino, self.tablero, enroque_movimiento=True))
\ No newline at end of file
@@ -0,0 +1,23 @@
+# setup.py
+# Compilación opcional del motor y la IA con Cython, para que la búsqueda de la IA vaya más rápida.
+#
+#   pip install cython
+#   python setup.py build_ext --inplace
+#
+# Deja chess_engine y chess_ai compilados (.so, o .pyd en Windows) junto a los .py; Python importa
+# primero el módulo compilado, así que ajedrez.py no cambia. Sin compilar (o borrando esos archivos),
+# el juego sigue usando los .py tal cual.
+
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    raise SystemExit("Hace falta Cython para compilar los módulos: pip install cython")
+
+setup(
+    name="ajedrez",
+    # No se desactivan boundscheck/wraparound: el motor indexa listas con -1 (historiales) y
+    # con wraparound=False Cython no tiene por qué tratar bien los índices negativos.
+    ext_modules=cythonize(["chess_engine.py", "chess_ai.py"], language_level=3),
+)